@@ -0,0 +1,96 @@
+"""
+Shared helpers of the ORCA parser scripts in this folder.
+
+The scripts are run from this folder, so they import these helpers as a sibling
+module (``from _orca_io import ...``).
+
+Functions:
+- list_orca_outs: Lists the ORCA *.out files of a folder.
+- map_cached: executor.map over files, with an optional SQLite cache of the results.
+- write_table: Writes a result table as CSV or Parquet.
+"""
+
+import os, pickle, sqlite3
+
+
+def list_orca_outs(folder):
+    """
+    Returns the sorted paths of the ORCA *.out files in *folder*.
+
+    Uses os.scandir, whose entries cache the file type from the directory read,
+    instead of glob's listdir + fnmatch.
+    """
+    with os.scandir(folder) as entries:
+        return sorted(entry.path for entry in entries
+                      if entry.name.endswith(".out") and not entry.name.startswith(".")
+                      and entry.is_file())
+
+def map_cached(executor, parse_one, paths, cache=None, parser=None, chunksize=16):
+    """
+    Yields parse_one(path) for every path in order, like executor.map.
+
+    With *cache* (path of an SQLite file), results are stored keyed by
+    (parser, path, st_mtime_ns, st_size); files that did not change since the
+    last run are loaded from the cache and only new or rewritten files are parsed.
+    *parser* names the parse function and its version (e.g. "energies:1"), so
+    several extractors can share one cache file and a parser change, with a new
+    version, does not reuse stale results.
+    """
+    if cache is None:
+        yield from executor.map(parse_one, paths, chunksize=chunksize)
+        return
+    if parser is None:
+        raise ValueError("A parser key is required to cache results")
+
+    con = sqlite3.connect(cache)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("CREATE TABLE IF NOT EXISTS parsed_results "
+                "(parser TEXT, path TEXT, mtime_ns INTEGER, size INTEGER, result BLOB, "
+                "PRIMARY KEY (parser, path))")
+    try:
+        keys, cached = [], {}
+        for path in paths:
+            st = os.stat(path)
+            key = (parser, os.path.abspath(path), st.st_mtime_ns, st.st_size)
+            keys.append(key)
+            row = con.execute("SELECT result FROM parsed_results "
+                              "WHERE parser = ? AND path = ? AND mtime_ns = ? AND size = ?",
+                              key).fetchone()
+            if row is not None:
+                cached[key] = pickle.loads(row[0])
+
+        # Parse only the files that are missing from the cache
+        misses = executor.map(parse_one, [path for path, key in zip(paths, keys) if key not in cached],
+                              chunksize=chunksize)
+        for key in keys:
+            if key in cached:
+                yield cached[key]
+            else:
+                result = next(misses)
+                con.execute("INSERT OR REPLACE INTO parsed_results VALUES (?, ?, ?, ?, ?)",
+                            (*key, pickle.dumps(result)))
+                yield result
+        con.commit()
+    finally:
+        con.close()
+
+def write_table(df, output_path, output_format='csv'):
+    """
+    Writes a DataFrame as CSV, or as Parquet next to *output_path* for other tools to re-read.
+
+    Args:
+        df (pd.DataFrame): Table to write.
+        output_path (str): Path of the CSV file; '.parquet' replaces its extension for Parquet.
+        output_format (str): 'csv' or 'parquet' (requires pyarrow).
+
+    Returns:
+        str: Path of the written file.
+    """
+    if output_format == 'parquet':
+        output_path = os.path.splitext(output_path)[0] + '.parquet'
+        df.to_parquet(output_path, index=False)
+    elif output_format == 'csv':
+        df.to_csv(output_path, index=False)
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
+    return output_path
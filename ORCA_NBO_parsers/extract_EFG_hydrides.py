@@ -6,12 +6,16 @@ Provides functionality to extract (e**2qQ, eta) values, raw EFG matrices, and co
 canonical orientation vectors.
 
 Functions:
+- extract_efg_all: Reads an ORCA output file once and extracts e**2qQ, eta and the raw
+  EFG matrix of every hydride nucleus.
 - extract_eqQ_and_eta_values: Reads an ORCA output file and extracts quadrupole coupling
   constants (e**2qQ) and asymmetry parameters (eta) for hydride nuclei.
 - process_hydride_csv: Processes a CSV file containing hydride indices and computes the
   corresponding EFG values, then writes the results to a new CSV file.
 - get_canonical_orientation: Diagonalizes an EFG matrix and computes the canonical
   orientation in a right-handed coordinate system.
+- get_canonical_orientations: Same as get_canonical_orientation for all EFG matrices
+  of a file, with a single batched diagonalization.
 - extract_raw_efg_matrices: Extracts the raw EFG matrices from an ORCA output file for
   all hydride nuclei.
 """
@@ -22,61 +26,157 @@ import os
 import pandas as pd
 import re
 import numpy as np
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from _orca_io import write_table
+
+# Use the multithreaded PyArrow CSV parser when it is available
+try:
+    import pyarrow  # noqa: F401
+    _CSV_ENGINE = 'pyarrow'
+except ImportError:
+    _CSV_ENGINE = 'c'
+
+# "Nucleus [Index]H", the Raw EFG matrix header, "e**2qQ = [value] MHz" and
+# "eta = [value]" in one alternation, so a whole file is scanned with a single finditer pass
+_EFG_TOKEN_RE = re.compile(
+    r'Nucleus\s+(\d+)H|(Raw EFG matrix)|e\*\*2qQ\s+=\s+([-\d.]+)\s+MHz|eta\s+=\s+([-\d.]+)'
+)
+_NUCLEUS_RE = re.compile(r'Nucleus\s+(\d+)H')
 
-def extract_eqQ_and_eta_values(file_path):
+# EFG data of one hydride nucleus; fields not found in the file are None
+EFGData = namedtuple('EFGData', ['eqQ', 'eta', 'raw_matrix'])
+
+def extract_efg_all(file_path):
     """
-    Extracts e**2qQ and eta values from an ORCA output file for each hydride nucleus.
+    Extracts e**2qQ, eta and the raw EFG matrix for each hydride nucleus in a single
+    pass over an ORCA output file.
 
     Args:
         file_path (str): Path to the ORCA output file.
 
     Returns:
-        dict: A dictionary with hydride indices and their corresponding (e**2qQ, eta) values.
+        dict: {nucleus_index: EFGData(eqQ, eta, raw_matrix)}, where eqQ is |e**2qQ|.
     """
     with open(file_path, 'r') as file:
-        content = file.readlines()
+        content = file.read()
 
     efg_values = {}
-    current_nucleus = None
+    raw_efg_matrices = {}
+    eqQ_nucleus = None     # nucleus still waiting for its (e**2qQ, eta) pair
+    matrix_nucleus = None  # nucleus still waiting for its raw EFG matrix
     current_eqQ = None
 
-    for line in content:
-        # Match "Nucleus [Index]H"
-        nucleus_match = re.search(r'Nucleus\s+(\d+)H', line)
-        if nucleus_match:
-            current_nucleus = int(nucleus_match.group(1))  # Extract nucleus index
+    for match in _EFG_TOKEN_RE.finditer(content):
+        nucleus, raw_header, eqQ, eta = match.groups()
+
+        # Matched "Nucleus [Index]H" to identify the start of a new atom's data
+        if nucleus is not None:
+            eqQ_nucleus = matrix_nucleus = int(nucleus)
             current_eqQ = None  # Reset for new nucleus
 
-        # Match "e**2qQ = [value] MHz"
-        if current_nucleus is not None:
-            eqQ_match = re.search(r'e\*\*2qQ\s+=\s+([-\d.]+)\s+MHz', line)
-            if eqQ_match:
-                current_eqQ = np.abs(float(eqQ_match.group(1)))
+        # Matched the Raw EFG matrix header, read the matrix lines below it
+        elif raw_header is not None:
+            if matrix_nucleus is not None:
+                raw_matrix = _read_raw_efg_rows(content, match.end())
+                if raw_matrix is not None:
+                    raw_efg_matrices[matrix_nucleus] = raw_matrix
+                    matrix_nucleus = None
+
+        elif eqQ_nucleus is None:
+            continue
+
+        # Matched "e**2qQ = [value] MHz"
+        elif eqQ is not None:
+            current_eqQ = np.abs(float(eqQ))
+
+        # Matched "eta = [value]"
+        elif current_eqQ is not None:
+            efg_values[eqQ_nucleus] = (current_eqQ, float(eta))
+            eqQ_nucleus = None  # Reset for the next block
+            current_eqQ = None
+
+    return {
+        nucleus: EFGData(*efg_values.get(nucleus, (None, None)),
+                         raw_efg_matrices.get(nucleus))
+        for nucleus in sorted(efg_values.keys() | raw_efg_matrices.keys())
+    }
+
+
+def _read_raw_efg_rows(content, pos):
+    """
+    Reads the three rows of a raw EFG matrix from the lines following *pos*.
+
+    Args:
+        content (str): Full text of the ORCA output file.
+        pos (int): Offset inside the 'Raw EFG matrix' header line.
+
+    Returns:
+        np.ndarray or None: The 3x3 matrix, or None if a new nucleus block starts
+                            (or the file ends) before three rows were found.
+    """
+    raw_matrix = np.empty((3, 3))
+    n_rows = 0
+    start = content.find('\n', pos) + 1
+
+    while n_rows < 3 and start:
+        end = content.find('\n', start)
+        line = content[start:end] if end >= 0 else content[start:]
+
+        # If a new atom's data starts, something went wrong, so we give up
+        if _NUCLEUS_RE.search(line):
+            return None
+
+        # Capture the three float values at the end of a matrix line
+        parts = line.split()
+        if len(parts) >= 3:
+            try:
+                raw_matrix[n_rows] = (float(parts[-3]), float(parts[-2]), float(parts[-1]))
+                n_rows += 1
+            except ValueError:
+                pass
+
+        start = end + 1
+
+    return raw_matrix if n_rows == 3 else None
 
-            # Match "eta = [value]"
-            eta_match = re.search(r'eta\s+=\s+([-\d.]+)', line)
-            if eta_match and current_eqQ is not None:
-                eta_value = float(eta_match.group(1))
-                efg_values[current_nucleus] = (current_eqQ, eta_value)
-                current_nucleus = None  # Reset for the next block
-                current_eqQ = None
 
-    return efg_values
+def extract_eqQ_and_eta_values(file_path):
+    """
+    Extracts e**2qQ and eta values from an ORCA output file for each hydride nucleus.
+
+    Args:
+        file_path (str): Path to the ORCA output file.
+
+    Returns:
+        dict: A dictionary with hydride indices and their corresponding (e**2qQ, eta) values.
+    """
+    return {nucleus: (data.eqQ, data.eta)
+            for nucleus, data in extract_efg_all(file_path).items()
+            if data.eqQ is not None}
 
 def process_hydride_csv(input_csv_path,
                         output_csv_path,
                         orca_folder_path,
-                        include_eta=True):
+                        include_eta=True,
+                        max_workers=None,
+                        output_format='csv'):
     """
     Processes a CSV of hydride indices, extracts e**2qQ (and optionally eta),
     and writes to a new CSV.
 
     Args:
       include_eta (bool): if False, only e**2qQ is output for all hydride types.
+      max_workers (int): number of processes parsing the ORCA files
+                         (default: one per CPU core).
+      output_format (str): 'csv' or 'parquet' (see write_table).
     """
-    df_in  = pd.read_csv(input_csv_path)
+    df_in  = pd.read_csv(input_csv_path, engine=_CSV_ENGINE)
     df_out = df_in.copy()
 
+    # Collect the rows with an ORCA output file first, so the files can be parsed in parallel
+    jobs = []
     for idx, row in df_in.iterrows():
         fname = row['Filename']
         if pd.isna(fname):
@@ -85,10 +185,19 @@ def process_hydride_csv(input_csv_path,
                                  fname.replace('.xyz','_input.inp.out'))
         if not os.path.isfile(orca_file):
             continue
+        jobs.append((idx, row, orca_file))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        efg_maps = list(executor.map(extract_efg_all,
+                                     [orca_file for _, _, orca_file in jobs],
+                                     chunksize=8))
 
-        efg_map = extract_eqQ_and_eta_values(orca_file)
+    # Assemble every output column as a list and assign it once after the loop
+    target_cols = ['Hydrides - mu1H','Hydrides - mu2H','Hydrides - mu3H','H2_coord']
+    cols_out = {col: df_in[col].tolist() for col in target_cols}
 
-        for col in ['Hydrides - mu1H','Hydrides - mu2H','Hydrides - mu3H','H2_coord']:
+    for (idx, row, _), efg_map in zip(jobs, efg_maps):
+        for col in target_cols:
             raw = row[col]
             if pd.isna(raw):
                 continue
@@ -104,8 +213,8 @@ def process_hydride_csv(input_csv_path,
                     pieces = []
                     for i in idxs:
                         val = efg_map.get(i-1)
-                        if val:
-                            pieces.append(f"({val[0]:.6f},{val[1]:.6f})")
+                        if val and val.eqQ is not None:
+                            pieces.append(f"({val.eqQ:.6f},{val.eta:.6f})")
                         else:
                             pieces.append("(N/A,N/A)")
                     out_entries.append(','.join(pieces))
@@ -114,30 +223,37 @@ def process_hydride_csv(input_csv_path,
                     pieces = []
                     for i in idxs:
                         val = efg_map.get(i-1)
-                        if val:
-                            pieces.append(f"{val[0]:.6f}")
+                        if val and val.eqQ is not None:
+                            pieces.append(f"{val.eqQ:.6f}")
                         else:
                             pieces.append("N/A")
                     out_entries.append(','.join(pieces))
 
-            df_out.at[idx, col] = sep.join(out_entries)
+            cols_out[col][idx] = sep.join(out_entries)
+
+    for col, vals in cols_out.items():
+        df_out[col] = vals
 
-    df_out.to_csv(output_csv_path, index=False)
+    write_table(df_out, output_csv_path, output_format)
 
 
 # Example usage:
-process_hydride_csv(
-    input_csv_path  = "EFG_data_indeces_only.csv",
-    output_csv_path = "EFG_data.csv",
-    orca_folder_path= "data_EFG",
-    include_eta     = False   # set True to include (e2qQ, eta) for mu2H/mu3H
-)
+if __name__ == "__main__":
+    process_hydride_csv(
+        input_csv_path  = "EFG_data_indeces_only.csv",
+        output_csv_path = "EFG_data.csv",
+        orca_folder_path= "data_EFG",
+        include_eta     = False   # set True to include (e2qQ, eta) for mu2H/mu3H
+    )
 
 import os
 import pandas as pd
 import re
 import numpy as np
 
+# Indices of the two remaining eigenvectors, given the index of the Z-axis one
+_OTHER_AXES = ((1, 2), (0, 2), (0, 1))
+
 def get_canonical_orientation(raw_efg_matrix):
     """
     Diagonalizes a raw EFG matrix and returns the canonical orientation vectors.
@@ -192,6 +308,54 @@ def get_canonical_orientation(raw_efg_matrix):
     }
 
 
+def get_canonical_orientations(raw_efg_matrices):
+    """
+    Batched version of get_canonical_orientation for all hydrides of one file.
+
+    All matrices are stacked into a (K, 3, 3) array and diagonalized with a single
+    np.linalg.eigh call; axis selection and the cross product are broadcast over K.
+
+    Args:
+        raw_efg_matrices (dict): {nucleus_index: np.ndarray} as returned by
+                                 extract_raw_efg_matrices.
+
+    Returns:
+        dict: {nucleus_index: {'X': [...], 'Y': [...], 'Z': [...]}}
+    """
+    if not raw_efg_matrices:
+        return {}
+
+    nuclei = list(raw_efg_matrices)
+    mats = np.stack([raw_efg_matrices[nucleus] for nucleus in nuclei])
+    rows = np.arange(len(nuclei))
+
+    # Eigendecomposition of all symmetric EFG matrices at once
+    eigvals, eigvecs = np.linalg.eigh(mats)
+
+    # Z-axis from the eigenvalue with the maximum absolute value
+    max_abs_idx = np.argmax(np.abs(eigvals), axis=1)
+    z_axes = eigvecs[rows, :, max_abs_idx]
+
+    # The other two eigenvectors, in ascending order as in get_canonical_orientation
+    other_indices = np.array(_OTHER_AXES)[max_abs_idx]
+    x_axes = eigvecs[rows, :, other_indices[:, 0]]
+    v2 = eigvecs[rows, :, other_indices[:, 1]]
+
+    # Right-handed system (X x Y = Z), Y flipped where it is anti-parallel to v2
+    y_axes = np.cross(z_axes, x_axes)
+    flip = np.einsum('ij,ij->i', y_axes, v2) < 0
+    y_axes[flip] = -y_axes[flip]
+
+    return {
+        nucleus: {
+            'X': x_axes[k].tolist(),
+            'Y': y_axes[k].tolist(),
+            'Z': z_axes[k].tolist()
+        }
+        for k, nucleus in enumerate(nuclei)
+    }
+
+
 def extract_raw_efg_matrices(file_path):
     """
     Extracts Raw EFG matrices from an ORCA output file for each hydride nucleus.
@@ -203,45 +367,9 @@ def extract_raw_efg_matrices(file_path):
         dict: A dictionary with hydride indices and their corresponding raw EFG matrix.
               Format: {nucleus_index: np.ndarray}
     """
-    with open(file_path, 'r') as file:
-        content = file.readlines()
-
-    raw_efg_matrices = {}
-    current_nucleus = None
-    efg_section = False
-    efg_matrix_lines = []
-
-    for line in content:
-        # Match "Nucleus [Index]H" to identify the start of a new atom's data
-        nucleus_match = re.search(r'Nucleus\s+(\d+)H', line)
-        if nucleus_match:
-            # If we were in an EFG section, something went wrong, so we reset
-            if efg_section:
-                efg_section = False
-                efg_matrix_lines = []
-            current_nucleus = int(nucleus_match.group(1))
-
-        # Check if we're entering the Raw EFG matrix section
-        if current_nucleus is not None and 'Raw EFG matrix' in line:
-            efg_section = True
-            efg_matrix_lines = []
-            continue
-
-        # If in the EFG section, collect the matrix lines
-        if efg_section and len(efg_matrix_lines) < 3:
-            # Regex to capture the three float values in a line
-            values_match = re.findall(r'([-]?\d+\.\d+)', line)
-            if len(values_match) == 3:
-                efg_matrix_lines.append([float(v) for v in values_match])
-
-            # Once we have 3 lines, the matrix is complete
-            if len(efg_matrix_lines) == 3:
-                raw_efg_matrices[current_nucleus] = np.array(efg_matrix_lines)
-                current_nucleus = None
-                efg_section = False
-                efg_matrix_lines = []
-
-    return raw_efg_matrices
+    return {nucleus: data.raw_matrix
+            for nucleus, data in extract_efg_all(file_path).items()
+            if data.raw_matrix is not None}
 
 
 def format_orientation_output(orientation_dict):
@@ -257,13 +385,15 @@ def format_orientation_output(orientation_dict):
     if not orientation_dict or any(key not in orientation_dict for key in ['X', 'Y', 'Z']):
         return 'N/A'
 
-    x_str = f"X({','.join(f'{val:.6f}' for val in orientation_dict['X'])})"
-    y_str = f"Y({','.join(f'{val:.6f}' for val in orientation_dict['Y'])})"
-    z_str = f"Z({','.join(f'{val:.6f}' for val in orientation_dict['Z'])})"
-    return f"{x_str};{y_str};{z_str}"
+    # Vectors always have 3 components, so format them in one f-string
+    x, y, z = orientation_dict['X'], orientation_dict['Y'], orientation_dict['Z']
+    return (f"X({x[0]:.6f},{x[1]:.6f},{x[2]:.6f});"
+            f"Y({y[0]:.6f},{y[1]:.6f},{y[2]:.6f});"
+            f"Z({z[0]:.6f},{z[1]:.6f},{z[2]:.6f})")
 
 
-def process_hydride_orientations_csv(input_csv_path, output_csv_path, orca_folder_path):
+def process_hydride_orientations_csv(input_csv_path, output_csv_path, orca_folder_path,
+                                     max_workers=None, output_format='csv'):
     """
     Processes a CSV, extracts raw EFG matrices, calculates canonical orientations,
     and saves them to a new CSV file.
@@ -272,15 +402,18 @@ def process_hydride_orientations_csv(input_csv_path, output_csv_path, orca_folde
         input_csv_path (str): Path to the input CSV file.
         output_csv_path (str): Path to save the output CSV file.
         orca_folder_path (str): Path to the folder containing ORCA output files.
+        max_workers (int): Number of processes parsing the ORCA files (default: one per CPU core).
+        output_format (str): 'csv' or 'parquet' (see write_table).
     """
-    input_data = pd.read_csv(input_csv_path)
+    input_data = pd.read_csv(input_csv_path, engine=_CSV_ENGINE)
     output_data = input_data.copy()
 
-    # Create new columns for the orientation data to avoid issues
+    # Collect the orientation data per new column, assigned to output_data once at the end
     hydride_cols = [col for col in input_data.columns if 'Hydrides' in col]
-    for col in hydride_cols:
-         output_data[f"{col}_orientations"] = ''
+    orientation_cols = {col: [''] * len(input_data) for col in hydride_cols}
 
+    # Collect the rows with an ORCA output file first, so the files can be parsed in parallel
+    jobs = []
     for idx, row in input_data.iterrows():
         filename = row['Filename']
         if pd.isna(filename):
@@ -290,9 +423,20 @@ def process_hydride_orientations_csv(input_csv_path, output_csv_path, orca_folde
         if not os.path.isfile(orca_file_path):
             print(f"Warning: ORCA output file not found for {filename}, skipping.")
             continue
+        jobs.append((idx, row, orca_file_path))
 
-        # Extract all raw EFG matrices from the ORCA file at once
-        raw_efg_matrices = extract_raw_efg_matrices(orca_file_path)
+    # Extract all EFG data from each ORCA file at once
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        efg_maps = list(executor.map(extract_efg_all,
+                                     [orca_file_path for _, _, orca_file_path in jobs],
+                                     chunksize=8))
+
+    for (idx, row, _), efg_map in zip(jobs, efg_maps):
+        raw_efg_matrices = {nucleus: data.raw_matrix for nucleus, data in efg_map.items()
+                            if data.raw_matrix is not None}
+
+        # Calculate the canonical orientations of all hydrides in the file at once
+        orientations = get_canonical_orientations(raw_efg_matrices)
 
         for col in hydride_cols:
             if pd.isna(row[col]):
@@ -308,24 +452,23 @@ def process_hydride_orientations_csv(input_csv_path, output_csv_path, orca_folde
 
                 entry_orientations = []
                 for hydride_idx in indices:
-                    # Get the raw EFG matrix for the current hydride
-                    raw_matrix = raw_efg_matrices.get(hydride_idx)
-
-                    # Calculate the canonical orientation from the raw matrix
-                    orientation_dict = get_canonical_orientation(raw_matrix)
+                    # Get the canonical orientation for the current hydride
+                    orientation_dict = orientations.get(hydride_idx, {})
 
                     # Format the result for output
                     entry_orientations.append(format_orientation_output(orientation_dict))
 
                 orientation_results.append(','.join(entry_orientations))
 
-            # Store the formatted string in the correct new column
-            new_col_name = f"{col}_orientations"
-            output_data.loc[idx, new_col_name] = separator.join(orientation_results)
+            # Store the formatted string for the correct new column
+            orientation_cols[col][idx] = separator.join(orientation_results)
+
+    for col, vals in orientation_cols.items():
+        output_data[f"{col}_orientations"] = vals
 
-    # Save the output to a new CSV file
-    output_data.to_csv(output_csv_path, index=False)
-    print(f"Canonical EFG orientations extracted and saved to {output_csv_path}")
+    # Save the output to a new CSV (or Parquet) file
+    output_path = write_table(output_data, output_csv_path, output_format)
+    print(f"Canonical EFG orientations extracted and saved to {output_path}")
 
 # Example usage:
 if __name__ == "__main__":
@@ -1,60 +1,110 @@
-import glob, os
+import csv, mmap, os, re
+from concurrent.futures import ProcessPoolExecutor
+
+from _orca_io import list_orca_outs, map_cached
+
 #extract homo-lumo gap from the ORCA stuff
 
+# Match an ORBITAL ENERGIES section (up to SPIN DOWN)
+# (bytes patterns, run directly against the memory-mapped file)
+_ORBITAL_SECTION_RE = re.compile(
+    rb"-{10,}\s*ORBITAL ENERGIES\s*-{10,}(.*?)(?:SPIN DOWN ORBITALS|(?=-{10,}))",
+    re.DOTALL
+)
+_ORBITAL_ENERGY_LINE_RE = re.compile(
+    rb"\s*\d+\s+([01]\.0000)\s+-?\d+\.\d+\s+(-?\d+\.\d+)"
+)
+
+# Key of this parser's entries in the results cache; bump the version when
+# _parse_one changes what it returns
+_CACHE_KEY = "extract_HLG:1"
 
-def extract_homo_lumo_gaps(folder=".", output="homo_lumo_gaps.csv"):
+def _last_orbital_block(content):
+    """
+    Returns the body of the last 'ORBITAL ENERGIES' section in *content* (or None).
+
+    Walks backwards from the last 'ORBITAL ENERGIES' marker, so only the tail of the
+    file is scanned instead of enumerating every section of an optimization run.
+    """
+    end = len(content)
+    while True:
+        marker = content.rfind(b"ORBITAL ENERGIES", 0, end)
+        if marker < 0:
+            return None
+
+        # Start from the dashed line above the marker
+        start = content.rfind(b"\n", 0, content.rfind(b"\n", 0, marker)) + 1
+        section_match = _ORBITAL_SECTION_RE.search(content, start)
+        if section_match:
+            return section_match.group(1)
+
+        # Not a section header (e.g. mentioned in the input echo), keep looking
+        end = marker
+
+def _parse_one(filepath):
+    """
+    Extracts HOMO and LUMO energies from the last 'ORBITAL ENERGIES' section of a single ORCA .out file.
+
+    Returns:
+        tuple: (filename, HOMO energy, LUMO energy, gap in eV)
+    """
+    homo_energy = None
+    lumo_energy = None
+    gap = None
+
+    if os.path.getsize(filepath) == 0:
+        return (os.path.basename(filepath), homo_energy, lumo_energy, gap)  # nothing to map
+
+    # Map the file instead of reading it, so only the pages the regex touches are loaded
+    # and only the captured energies are decoded
+    with open(filepath, "rb") as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+
+        # Find the last orbital energy block
+        last_orbital_block = _last_orbital_block(content)
+        if last_orbital_block is not None:
+            orbital_lines = _ORBITAL_ENERGY_LINE_RE.findall(last_orbital_block)
+
+            for occ, energy in orbital_lines:
+                energy = float(energy)
+                if occ == b"1.0000":
+                    homo_energy = energy
+                elif occ == b"0.0000" and homo_energy is not None:
+                    lumo_energy = energy
+                    gap = lumo_energy - homo_energy
+                    break
+
+    return (os.path.basename(filepath), homo_energy, lumo_energy, gap)
+
+
+def extract_homo_lumo_gaps(folder=".", output="homo_lumo_gaps.csv", max_workers=None,
+                           collect=True, cache=None):
     """
     Extracts HOMO-LUMO gaps from the *last* 'ORBITAL ENERGIES' section in ORCA .out files.
 
     Parameters:
         folder (str): Path to the folder containing .out files.
         output (str): Filename for the output CSV file.
+        max_workers (int): Number of worker processes (default: one per CPU core).
+        collect (bool): Also keep the rows in memory and return them. With False, rows are
+                        only streamed to the CSV file and None is returned.
+        cache (str): Optional SQLite file (e.g. "homo_lumo_cache.sqlite") caching the parsed values;
+                     unchanged files are not parsed again on later runs.
 
     Returns:
         results (list of tuples): Each tuple contains (filename, HOMO energy, LUMO energy, gap in eV)
     """
-    # Match all ORBITAL ENERGIES sections (up to SPIN DOWN)
-    orbital_section_pattern = re.compile(
-        r"-{10,}\s*ORBITAL ENERGIES\s*-{10,}(.*?)(?:SPIN DOWN ORBITALS|(?=-{10,}))",
-        re.DOTALL
-    )
-    orbital_energy_line_pattern = re.compile(
-        r"\s*\d+\s+([01]\.0000)\s+-?\d+\.\d+\s+(-?\d+\.\d+)"
-    )
-
-    results = []
-    search_pattern = os.path.join(folder, "*.out")
-
-    for filepath in glob.glob(search_pattern):
-        homo_energy = None
-        lumo_energy = None
-        gap = None
-
-        with open(filepath, "r") as file:
-            content = file.read()
-
-            # Find all orbital energy blocks and select the last one
-            orbital_matches = orbital_section_pattern.findall(content)
-            if orbital_matches:
-                last_orbital_block = orbital_matches[-1]
-                orbital_lines = orbital_energy_line_pattern.findall(last_orbital_block)
-
-                for occ, energy in orbital_lines:
-                    energy = float(energy)
-                    if occ == "1.0000":
-                        homo_energy = energy
-                    elif occ == "0.0000" and homo_energy is not None:
-                        lumo_energy = energy
-                        gap = lumo_energy - homo_energy
-                        break
-
-        results.append((os.path.basename(filepath), homo_energy, lumo_energy, gap))
-
-    # Write to CSV
-    with open(output, "w") as out_file:
-        out_file.write("Filename,HOMO (eV),LUMO (eV),HOMO-LUMO Gap (eV)\n")
-        for filename, homo, lumo, gap in results:
-            out_file.write(f"{filename},{homo},{lumo},{gap}\n")
+    results = [] if collect else None
+
+    # Parse the .out files in parallel and write each row to CSV as soon as it is available
+    with open(output, "w", newline="") as out_file, \
+            ProcessPoolExecutor(max_workers=max_workers) as executor:
+        writer = csv.writer(out_file)
+        writer.writerow(["Filename", "HOMO (eV)", "LUMO (eV)", "HOMO-LUMO Gap (eV)"])
+        for row in map_cached(executor, _parse_one, list_orca_outs(folder), cache, _CACHE_KEY):
+            writer.writerow(row)
+            if collect:
+                results.append(row)
 
     print(f"HOMO-LUMO gaps saved to {output}")
     return results
@@ -10,12 +10,85 @@ The function handles the identification of matrices and optional reference
 values, performs calculations, and outputs results in a structured format.
 """
 
-import os, re, glob, pandas as pd
+import os, re, mmap, numpy as np, pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from _orca_io import list_orca_outs, write_table
+
+# ---------- regex helpers ---------------------------------------------------
+# (bytes patterns, run directly against the memory-mapped *.out file)
+_FLOAT_RE = rb"([-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)"
+_NUCLEUS_HEADER_RE = re.compile(
+    rb"^\s*-+\s*\n\s*Nucleus\s+(\d{1,3}P)\s*:\s*\n\s*-+",
+    re.MULTILINE
+)
+_ROW_NAMES = ("sDSO", "sPSO", "Total")
+# all three rows in one alternation, so a P block is scanned once
+_ROW_RE = re.compile(
+    rb"(sDSO|sPSO|Total)\s+" + _FLOAT_RE + rb"\s+" + _FLOAT_RE + rb"\s+" + _FLOAT_RE
+    + rb"\s+iso=\s+" + _FLOAT_RE)
+_BEA_RE = re.compile("bea", flags=re.I)
+
+# output columns, in the row-major order of a (3 rows x 4 values) diff matrix
+_DIFF_COLUMNS = [f"d_{name}_{value}" for name in _ROW_NAMES
+                 for value in ("v1", "v2", "v3", "iso")]
+_NO_BLOCKS = np.empty((0, len(_DIFF_COLUMNS)))
+
+def _parse_one(path, ref_std, ref_bea):
+    """
+    Parse one ORCA *.out file and return a (K, 12) array with one row per
+    phosphorus block, holding the differences to the reference values in
+    _DIFF_COLUMNS order.
+    *ref_std* / *ref_bea* are (3, 4) arrays with rows sDSO, sPSO, Total.
+    """
+    if os.path.getsize(path) == 0:
+        return _NO_BLOCKS  # nothing to map
+
+    # map the file: no decode of the whole text, pages are loaded on demand
+    with open(path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as text:
+        return _parse_blocks(path, text, ref_std, ref_bea)
+
+def _parse_blocks(path, text, ref_std, ref_bea):
+    """
+    Walk the phosphorus blocks of the mapped file *text* (see _parse_one).
+    """
+    blocks = list(_NUCLEUS_HEADER_RE.finditer(text))
+    if not blocks:
+        return _NO_BLOCKS  # no phosphorus in this file
+
+    # choose reference set
+    ref = ref_bea if _BEA_RE.search(os.path.basename(path)) else ref_std
+
+    diffs = np.empty((len(blocks), len(_DIFF_COLUMNS)))
+
+    # walk through every P block
+    for i, hdr in enumerate(blocks):
+        start = hdr.start()
+        end   = blocks[i+1].start() if i+1 < len(blocks) else len(text)
+
+        # first occurrence of each row inside the block wins,
+        # rows not found stay NaN
+        vals = np.full((len(_ROW_NAMES), 4), np.nan)
+        found = set()
+        for m in _ROW_RE.finditer(text, start, end):
+            name = m.group(1).decode()
+            if name not in found:
+                found.add(name)
+                vals[_ROW_NAMES.index(name)] = [float(m.group(g)) for g in range(2,6)]
+
+        diffs[i] = (ref - vals).ravel()
+
+    return diffs
 
 def extract_chem_shift_matrix_ORCA(folder=".",
                                    output="diag_matrix_diff_P.csv",
                                    ref_std=None,
-                                   ref_bea=None):
+                                   ref_bea=None,
+                                   max_workers=None,
+                                   output_format="csv",
+                                   as_frame=False):
     """
     Scan every *.out in *folder*, locate the diagonalised sT*s matrix for
     phosphorus nuclei, subtract reference values, and write a CSV.
@@ -24,6 +97,14 @@ def extract_chem_shift_matrix_ORCA(folder=".",
       set is used, otherwise the standard reference set.
     * Provide custom references with *ref_std* / *ref_bea*
       (each a dict with keys 'sDSO','sPSO','Total', value=list[4 floats]).
+    * Files are parsed in parallel by *max_workers* processes
+      (default: one per CPU core).
+    * With output_format="parquet" the table is written to *output* with a
+      .parquet extension instead (requires pyarrow).
+
+    Returns one record (dict) per phosphorus block with the keys Filename and
+    d_<row>_<value>; a difference is None when its row was not found.
+    With as_frame=True the written table is returned as a pandas DataFrame instead.
     """
 
     # ---------- reference data ----------------------------------------------
@@ -39,62 +120,36 @@ def extract_chem_shift_matrix_ORCA(folder=".",
     #     "Total": [196.562, 197.230   , 412.485 , 268.759]
     # }
 
-    # ---------- regex helpers -----------------------------------------------
-    float_re = r"([-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)"
-    nucleus_header_pat = re.compile(
-        r"^\s*-+\s*\n\s*Nucleus\s+(\d{1,3}P)\s*:\s*\n\s*-+",
-        re.MULTILINE
-    )
-    row_pat = {name: re.compile(
-        fr"{name}\s+{float_re}\s+{float_re}\s+{float_re}\s+iso=\s+{float_re}")
-        for name in ("sDSO", "sPSO", "Total")
-    }
-
-    records = []
-
-    # ---------- loop over all ORCA *.out files -------------------------------
-    for path in glob.glob(os.path.join(folder, "*.out")):
-        with open(path, "r", errors="ignore") as f:
-            text = f.read()
-
-        blocks = list(nucleus_header_pat.finditer(text))
-        if not blocks:
-            continue  # no phosphorus in this file
-
-        # choose reference set
-        ref = ref_bea if re.search("bea", os.path.basename(path), flags=re.I) else ref_std
-
-        # walk through every P block
-        for i, hdr in enumerate(blocks):
-            start = hdr.start()
-            end   = blocks[i+1].start() if i+1 < len(blocks) else len(text)
-            chunk = text[start:end]
-
-            diffs = {}
-            for name, pat in row_pat.items():
-                m = pat.search(chunk)
-                if m:
-                    vals  = [float(m.group(g)) for g in range(1,5)]
-                    diffs[name] = [ref[name][k] - vals[k] for k in range(4)]
-                else:
-                    diffs[name] = [None]*4
-
-            records.append({
-                "Filename": os.path.basename(path),
-                #"Nucleus":  hdr.group(1),
-                "d_sDSO_v1":   diffs["sDSO"][0], "d_sDSO_v2":   diffs["sDSO"][1],
-                "d_sDSO_v3":   diffs["sDSO"][2], "d_sDSO_iso":  diffs["sDSO"][3],
-                "d_sPSO_v1":   diffs["sPSO"][0], "d_sPSO_v2":   diffs["sPSO"][1],
-                "d_sPSO_v3":   diffs["sPSO"][2], "d_sPSO_iso":  diffs["sPSO"][3],
-                "d_Total_v1":  diffs["Total"][0],"d_Total_v2":  diffs["Total"][1],
-                "d_Total_v3":  diffs["Total"][2],"d_Total_iso": diffs["Total"][3],
-            })
-
-    # ---------- write CSV ----------------------------------------------------
-    df = pd.DataFrame(records)
-    df.to_csv(output, index=False)
+    ref_std_arr = np.array([ref_std[name] for name in _ROW_NAMES], dtype=float)
+    ref_bea_arr = np.array([ref_bea[name] for name in _ROW_NAMES], dtype=float)
+
+    # ---------- parse all ORCA *.out files in parallel ----------------------
+    # columns are collected directly (one list / array per column) instead
+    # of one dict per block, so pandas does not have to transpose records
+    paths = list_orca_outs(folder)
+    parse_one = partial(_parse_one, ref_std=ref_std_arr, ref_bea=ref_bea_arr)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        per_file = list(executor.map(parse_one, paths, chunksize=8))
+
+    filenames = [os.path.basename(path)
+                 for path, diffs in zip(paths, per_file) for _ in range(len(diffs))]
+    diffs = np.vstack([_NO_BLOCKS, *per_file])
+    cols = {"Filename": filenames}
+    cols.update(zip(_DIFF_COLUMNS, diffs.T))
+
+    # ---------- write CSV (or Parquet) --------------------------------------
+    df = pd.DataFrame(cols)
+    output = write_table(df, output, output_format)
     print(f"{len(df)} phosphorus block(s) processed → '{output}'")
-    return records
+    if as_frame:
+        return df
+
+    # records are only built for the return value, from the stacked diff array
+    # (NaN marks a row that was not found, returned as None)
+    return [{"Filename": filename,
+             **{col: (None if value != value else value)
+                for col, value in zip(_DIFF_COLUMNS, row)}}
+            for filename, row in zip(filenames, diffs.tolist())]
 
 if __name__ == "__main__":
     extract_chem_shift_matrix_ORCA(folder="data_ORCA_NMR/all_outs_ZORA",output="NMR_ORCA_ZORA.csv")
\ No newline at end of file
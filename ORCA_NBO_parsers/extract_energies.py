@@ -1,49 +1,80 @@
-import os, re, glob
+import csv, os, re
+from concurrent.futures import ProcessPoolExecutor
 
-def extract_energies(folder=".", output="energies.csv"):
+from _orca_io import list_orca_outs, map_cached
+
+# Regular expressions for energy extraction
+_ELECTRONIC_ENERGY_RE = re.compile(r"FINAL SINGLE POINT ENERGY\s+(-?\d+\.\d+)")
+_FREE_ENERGY_RE = re.compile(r"Final Gibbs free energy\s+.*?(-?\d+\.\d+)\s+Eh")
+
+# Key of this parser's entries in the results cache; bump the version when
+# _parse_one changes what it returns
+_CACHE_KEY = "extract_energies:1"
+
+def _last_match(pattern, marker, content):
+    """
+    Returns the captured value of the last match of *pattern* in *content* (or None).
+
+    Searches backwards from the last occurrence of the literal *marker* the pattern
+    starts with, instead of collecting every match in the file.
+    """
+    end = len(content)
+    while True:
+        start = content.rfind(marker, 0, end)
+        if start < 0:
+            return None
+        match = pattern.match(content, start)
+        if match:
+            return match.group(1)
+        end = start
+
+def _parse_one(filepath):
+    """
+    Extracts the last electronic energy and Gibbs free energy from a single ORCA .out file.
+
+    Returns:
+        tuple: (filename, electronic energy, free energy)
+    """
+    with open(filepath, "r") as file:
+        content = file.read()
+
+    # Extract the last occurrence of each energy type
+    electronic_energy = _last_match(_ELECTRONIC_ENERGY_RE, "FINAL SINGLE POINT ENERGY", content)
+    free_energy = _last_match(_FREE_ENERGY_RE, "Final Gibbs free energy", content)
+
+    # Store the results using the basename of the file for clarity
+    return (os.path.basename(filepath), electronic_energy, free_energy)
+
+def extract_energies(folder=".", output="energies.csv", max_workers=None, collect=True,
+                     cache=None):
     """
     Extracts electronic energy and Gibbs free energy values from ORCA .out files in the specified folder.
 
     Parameters:
         folder (str): Path to the folder containing .out files.
         output (str): Filename for the output CSV file.
+        max_workers (int): Number of worker processes (default: one per CPU core).
+        collect (bool): Also keep the rows in memory and return them. With False, rows are
+                        only streamed to the CSV file and None is returned.
+        cache (str): Optional SQLite file (e.g. "energies_cache.sqlite") caching the parsed values;
+                     unchanged files are not parsed again on later runs.
 
     Returns:
         results (list of tuples): A list of tuples, each containing
                                   (filename, electronic energy, free energy).
     """
-    # Compile regular expressions for energy extraction
-    electronic_energy_pattern = re.compile(r"FINAL SINGLE POINT ENERGY\s+(-?\d+\.\d+)")
-    free_energy_pattern = re.compile(r"Final Gibbs free energy\s+.*?(-?\d+\.\d+)\s+Eh")
-
-    results = []
-    search_pattern = os.path.join(folder, "*.out")
-
-    # Loop over all .out files in the specified folder
-    for filepath in glob.glob(search_pattern):
-        electronic_energy = None
-        free_energy = None
-
-        with open(filepath, "r") as file:
-            content = file.read()
-
-            # Extract the last occurrence of each energy type
-            e_matches = electronic_energy_pattern.findall(content)
-            if e_matches:
-                electronic_energy = e_matches[-1]
-
-            f_matches = free_energy_pattern.findall(content)
-            if f_matches:
-                free_energy = f_matches[-1]
-
-        # Store the results using the basename of the file for clarity
-        results.append((os.path.basename(filepath), electronic_energy, free_energy))
-
-    # Write the results to the specified CSV file
-    with open(output, "w") as out_file:
-        out_file.write("Filename,Electronic Energy,Free Energy\n")
-        for filename, e_energy, g_energy in results:
-            out_file.write(f"{filename},{e_energy},{g_energy}\n")
+    results = [] if collect else None
+
+    # Parse all .out files in the specified folder in parallel and write each row
+    # to the specified CSV file as soon as it is available
+    with open(output, "w", newline="") as out_file, \
+            ProcessPoolExecutor(max_workers=max_workers) as executor:
+        writer = csv.writer(out_file)
+        writer.writerow(["Filename", "Electronic Energy", "Free Energy"])
+        for row in map_cached(executor, _parse_one, list_orca_outs(folder), cache, _CACHE_KEY):
+            writer.writerow(row)
+            if collect:
+                results.append(row)
 
     print(f"Results saved to {output}")
     return results
@@ -18,11 +18,26 @@ Functions:
     parse_hydride_field(field):
         Parses a formatted string of hydride indices and identifies separators.
 
-    extract_best_mode_for_atom(matrix, freqs, atom_number):
+    atom_mode_amplitudes(matrix):
+        Computes the squared displacement amplitude of every atom in every mode.
+
+    extract_best_mode_for_atom(amps_all, freqs, atom_number, in_range=None):
         Determines the best vibrational mode for a specific atom based on amplitude
         and falls within the defined IR-active frequency range.
 
-    process_row(row, hydride_cols, out_folder):
+    best_mode_frequencies(amps_all, freqs, in_range=None):
+        Same selection as extract_best_mode_for_atom, for all atoms at once.
+
+    index_out_files(out_folder):
+        Lists the .out files of the folder once, sorted for prefix lookups.
+
+    find_out_file(row, out_folder, out_files):
+        Locates the .out file belonging to a CSV row.
+
+    hydride_mode_values(row, hydride_cols, best_freqs):
+        Formats the best-mode frequencies of the hydride groups of a CSV row.
+
+    process_row(row, hydride_cols, out_folder, out_files=None):
         Processes each row of the CSV, matches it to an .out file, computes vibrational
         frequencies for hydrides groups, and updates the row with new values.
 
@@ -33,17 +48,27 @@ Script Execution:
 
 ## TODO - make the script read hydrides without input file also
 
-import csv
+import bisect
+import functools
+from collections import defaultdict
 import numpy as np
+import pandas as pd
 import sys
 import os
 import re
 
+# Use the multithreaded PyArrow CSV reader when it is installed
+try:
+    import pyarrow  # noqa: F401
+    _CSV_ENGINE = 'pyarrow'
+except ImportError:
+    _CSV_ENGINE = 'c'
+
 def load_vibrational_data(filepath):
     """
     Open the .out file and extract:
       - Vibrational frequencies (numpy array)
-      - Full displacement (normal mode) matrix (numpy array)
+      - Full displacement (normal mode) matrix (float32 numpy array)
     """
     freqs = []
     try:
@@ -53,23 +78,29 @@ def load_vibrational_data(filepath):
         sys.exit(f"Error opening {filepath}: {e}")
 
     # --- Extract frequencies ---
-    in_freq_block = False
-    for line in lines:
-        if "VIBRATIONAL FREQUENCIES" in line:
-            in_freq_block = True
+    # Walk to the section title, then read only the numbered lines of the list
+    # ("   6:      1234.56 cm**-1"), split on ':' instead of a regex
+    n = len(lines)
+    freq_end = 0
+    while freq_end < n and "VIBRATIONAL FREQUENCIES" not in lines[freq_end]:
+        freq_end += 1
+    for freq_end in range(freq_end + 1, n):
+        stripped = lines[freq_end].strip()
+        if not stripped:
+            if freqs:
+                break  # a blank line closes the list
             continue
-        if in_freq_block:
-            if not line.strip() or set(line.strip()) == set("-"):
-                continue
-            m = re.match(r"\s*(\d+):\s*([\d\.\-Ee]+)", line)
-            if m:
-                freqs.append(float(m.group(2)))
-            else:
-                if freqs:
-                    in_freq_block = False
+        if set(stripped) == set("-"):
+            continue
+        idx, sep, rest = stripped.partition(':')
+        if sep and idx.isdigit():
+            freqs.append(float(rest.split()[0]))
+        elif freqs:
+            break  # end of the frequency list, the rest of the file is not needed here
 
     # --- Parse displacement matrix blocks ---
-    i, n = 0, len(lines)
+    # (NORMAL MODES follows the frequency list)
+    i = freq_end if freqs else 0
     while i < n and "NORMAL MODES" not in lines[i]:
         i += 1
     if i == n:
@@ -80,8 +111,14 @@ def load_vibrational_data(filepath):
     while i < n and not lines[i].lstrip().startswith(tuple('0123456789')):
         i += 1
 
-    blocks = []
-    block_nrows = None
+    # The matrix has one column per mode, i.e. per frequency: it is allocated
+    # once and every block is written into its columns (no hstack copy).
+    # float32 is plenty for the printed 6-decimal displacements and halves the
+    # memory traffic of the amplitude computation.
+    if not freqs:
+        sys.exit(f"No vibrational frequencies found in {filepath}")
+    matrix = None
+    ncols = 0
     while i < n and lines[i].lstrip()[0].isdigit():
         # Skip header line
         i += 1
@@ -96,31 +133,39 @@ def load_vibrational_data(filepath):
             data_lines.append(lines[i].rstrip())
             i += 1
 
-        # Parse block
-        block_data = []
+        # Parse block: gather the value tokens of all rows and convert them
+        # in a single NumPy call instead of float() per token
+        values = []
+        nrows = 0
         for dl in data_lines:
             toks = dl.split()
             if len(toks) < 2:
                 continue
-            block_data.append([float(x) for x in toks[1:]])
-
-        if block_data:
-            arr = np.array(block_data)
-            if block_nrows is None:
-                block_nrows = arr.shape[0]
-            elif arr.shape[0] != block_nrows:
+            values.extend(toks[1:])
+            nrows += 1
+
+        if nrows:
+            arr = np.array(values, dtype=np.float32).reshape(nrows, -1)
+            if matrix is None:
+                matrix = np.empty((nrows, len(freqs)), dtype=np.float32)
+            elif nrows != matrix.shape[0]:
                 sys.exit(f"Inconsistent row counts in blocks in {filepath}")
-            blocks.append(arr)
+            if ncols + arr.shape[1] > matrix.shape[1]:
+                sys.exit(f"More normal modes than frequencies in {filepath}")
+            matrix[:, ncols:ncols + arr.shape[1]] = arr
+            ncols += arr.shape[1]
 
         # Skip blank lines
         while i < n and not lines[i].strip():
             i += 1
 
-    if not blocks:
+    if matrix is None:
         sys.exit(f"No displacement matrix data found in {filepath}")
 
-    matrix = np.hstack(blocks)
-    return matrix, np.array(freqs)
+    return matrix[:, :ncols], np.array(freqs)
+
+# Atom indices within a hydride group
+_INT_RE = re.compile(r'\d+')
 
 def parse_hydride_field(field):
     """
@@ -137,44 +182,79 @@ def parse_hydride_field(field):
     else:
         group_sep = ','
 
-    group_strs = [grp.strip() for grp in f.split(group_sep) if grp.strip()]
-    groups = []
-    for grp in group_strs:
-        parts = [p.strip() for p in grp.split(',') if p.strip()]
-        groups.append([int(x) for x in parts])
+    # one regex scan per group picks up all atom indices, whatever the spacing
+    groups = [[int(x) for x in _INT_RE.findall(grp)]
+              for grp in f.split(group_sep) if grp.strip()]
 
     return groups, group_sep
 
 MIN_FREQ = 800.0  # cm^-1
 MAX_FREQ = 2700.0  # cm^-1
 
-def extract_best_mode_for_atom(matrix, freqs, atom_number):
+def atom_mode_amplitudes(matrix):
+    """
+    Squared displacement amplitude of every atom in every mode.
+    Returns an (n_atoms, n_modes) array: row k sums the x, y, z rows of atom k+1.
+    """
+    # (n_atoms, 3, n_modes) view: the x, y, z rows of one atom are contiguous,
+    # and einsum sums the squares without a squared copy of the whole matrix
+    per_atom = np.ascontiguousarray(matrix).reshape(-1, 3, matrix.shape[1])
+    return np.einsum('aij,aij->aj', per_atom, per_atom)
+
+def extract_best_mode_for_atom(amps_all, freqs, atom_number, in_range=None):
     """
     For a given atom (1-based), find the mode with maximal displacement within the
-    IR-active range. Iterate down-ranked modes until one falls within [MIN_FREQ, MAX_FREQ].
+    IR-active range [MIN_FREQ, MAX_FREQ], using the amplitudes from atom_mode_amplitudes.
     If none qualify, return the top mode regardless of frequency.
+    *in_range* is the optional precomputed mask of modes within the range.
     """
-    start_row = (atom_number - 1) * 3
-    block = matrix[start_row:start_row+3, :]
-    amps = np.sum(block**2, axis=0)
-
-    # Sort mode indices by descending amplitude
-    sorted_idx = np.argsort(amps)[::-1]
+    if in_range is None:
+        in_range = (freqs >= MIN_FREQ) & (freqs <= MAX_FREQ)
+    amps = amps_all[atom_number - 1]
 
-    # Look for first mode within desired range
-    for idx in sorted_idx:
-        freq_val = freqs[idx]
-        if MIN_FREQ <= freq_val <= MAX_FREQ:
-            return freq_val
+    # Highest-amplitude mode within desired range (amplitudes are >= 0)
+    masked = np.where(in_range, amps, -1.0)
+    idx = masked.argmax()
+    if masked[idx] >= 0:
+        return freqs[idx]
 
     # Fallback: return highest-amplitude mode
-    best_idx = sorted_idx[0]
-    return freqs[best_idx]
+    return freqs[amps.argmax()]
 
-def process_row(row, hydride_cols, out_folder):
+def best_mode_frequencies(amps_all, freqs, in_range=None):
     """
-    Process one CSV row: locate its .out file, extract best-mode frequencies.
-    Returns a dict mapping each hydride column to its new value.
+    Best-mode frequency of every atom (see extract_best_mode_for_atom), computed for
+    all rows of amps_all at once. Returns an (n_atoms,) array; entry k is atom k+1.
+    """
+    if in_range is None:
+        in_range = (freqs >= MIN_FREQ) & (freqs <= MAX_FREQ)
+
+    # Highest-amplitude in-range mode per atom, highest-amplitude mode as fallback
+    masked = np.where(in_range, amps_all, -1.0)
+    best_in = masked.argmax(axis=1)
+    found = masked[np.arange(len(masked)), best_in] >= 0
+    return freqs[np.where(found, best_in, amps_all.argmax(axis=1))]
+
+@functools.lru_cache(maxsize=128)
+def _load_mode_data(filepath):
+    """
+    Memoized per .out file: best-mode frequency per atom (best_mode_frequencies),
+    so rows referring to the same file do not parse it again.
+    """
+    matrix, freqs = load_vibrational_data(filepath)
+    return best_mode_frequencies(atom_mode_amplitudes(matrix), freqs)
+
+def index_out_files(out_folder):
+    """
+    Sorted names of the .out files in out_folder, scanned once and searched
+    by prefix with bisect (see process_row).
+    """
+    return sorted(f for f in os.listdir(out_folder) if f.endswith('.out'))
+
+def find_out_file(row, out_folder, out_files):
+    """
+    Locate the .out file of one CSV row (first file in out_files whose name starts
+    with the row's base name). Returns its path, or None if there is none.
     """
     # Determine base name
     fname = (row.get('Filename') or row.get('Basename') or '').strip()
@@ -182,29 +262,52 @@ def process_row(row, hydride_cols, out_folder):
         fname += '.xyz'
     print (fname)
     base = os.path.splitext(fname)[0]
-    candidates = [f for f in os.listdir(out_folder)
-                  if f.startswith(base) and f.endswith('.out')]
-    if candidates:
-        matrix, freqs = load_vibrational_data(os.path.join(out_folder, candidates[0]))
-        new_vals = {}
-
-        for col in hydride_cols:
-            parsed, sep = parse_hydride_field(row[col])
-            if parsed is None:
-                new_vals[col] = row[col]
-            else:
-                group_outputs = []
-                for group in parsed:
-                    freqs_list = [f"{extract_best_mode_for_atom(matrix, freqs, atom):.2f}"
-                                  for atom in group]
-                    group_outputs.append(','.join(freqs_list))
-                new_vals[col] = sep.join(group_outputs)
-
-        return new_vals
-    else:
+    # first file name starting with base, if any, sorts right at base
+    pos = bisect.bisect_left(out_files, base)
+    if pos < len(out_files) and out_files[pos].startswith(base):
+        return os.path.join(out_folder, out_files[pos])
+    return None
+
+def hydride_mode_values(row, hydride_cols, best_freqs):
+    """
+    Best-mode frequencies for the hydride groups of one CSV row, given the
+    per-atom best-mode frequencies of its .out file.
+    Returns a dict mapping each hydride column to its new value.
+    """
+    new_vals = {}
+
+    for col in hydride_cols:
+        parsed, sep = parse_hydride_field(row[col])
+        if parsed is None:
+            new_vals[col] = row[col]
+        else:
+            group_outputs = []
+            for group in parsed:
+                freqs_list = [f"{best_freqs[atom - 1]:.2f}"
+                              for atom in group]
+                group_outputs.append(','.join(freqs_list))
+            new_vals[col] = sep.join(group_outputs)
+
+    return new_vals
+
+def process_row(row, hydride_cols, out_folder, out_files=None):
+    """
+    Process one CSV row: locate its .out file, extract best-mode frequencies.
+    Returns a dict mapping each hydride column to its new value, or 'n/a' if
+    no .out file is found.
+    out_files is the index from index_out_files (built here if not given).
+    """
+    if out_files is None:
+        out_files = index_out_files(out_folder)
+
+    path = find_out_file(row, out_folder, out_files)
+    if path is None:
         #sys.exit(f"Could not find .out file for {fname}")
         return('n/a')
 
+    # best modes are computed once per file for all atoms, not once per atom
+    return hydride_mode_values(row, hydride_cols, _load_mode_data(path))
+
 if __name__ == '__main__':
 
     input_csv   = 'EFG_data_indeces_only.csv'
@@ -216,23 +319,36 @@ if __name__ == '__main__':
         'Hydrides - mu3H'
     ]
 
-    # Read CSV
-    with open(input_csv, newline='', encoding='utf-8-sig') as f:
-        rows = list(csv.DictReader(f))
-
-    # Process each row
-    for row in rows:
-        new_values = process_row(row, hydride_cols, out_folder)
-        if new_values == 'n/a':
-                row = 'n/a'
+    # Read CSV (every field as text, 'n/a' and empty cells kept as written)
+    df = pd.read_csv(input_csv, engine=_CSV_ENGINE, dtype=str, keep_default_na=False,
+                     encoding='utf-8-sig')
+
+    # Match each row to its .out file, passing only the fields needed;
+    # new values are collected per column and assigned in bulk
+    fields = [col for col in ('Filename', 'Basename') if col in df.columns] + hydride_cols
+    new_cols = {col: df[col].tolist() for col in hydride_cols}
+    out_files = index_out_files(out_folder)
+    rows_by_file = defaultdict(list)
+    for idx, values in enumerate(df[fields].itertuples(index=False, name=None)):
+        row = dict(zip(fields, values))
+        path = find_out_file(row, out_folder, out_files)
+        if path is None:
+            # no .out file for this row
+            for col in hydride_cols:
+                new_cols[col][idx] = 'n/a'
         else:
-            for col, val in new_values.items():
-                row[col] = val
+            rows_by_file[path].append((idx, row))
+
+    # Parse each .out file once and fill in all of its rows
+    for path, file_rows in rows_by_file.items():
+        best_freqs = _load_mode_data(path)
+        for idx, row in file_rows:
+            for col, val in hydride_mode_values(row, hydride_cols, best_freqs).items():
+                new_cols[col][idx] = val
 
     # Write output
-    with open(output_csv, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-        writer.writeheader()
-        writer.writerows(rows)
+    for col, vals in new_cols.items():
+        df[col] = vals
+    df.to_csv(output_csv, index=False)
 
     print(f"Extraction complete. Output written to {output_csv}")
\ No newline at end of file
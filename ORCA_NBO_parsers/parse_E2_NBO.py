@@ -7,15 +7,17 @@ from NBO output files and extract LP orbital indices for specific oxygen atoms.
 The results are returned as pandas DataFrames, which can be used for further analysis or saved as CSV files.
 """
 
+import os
 import re
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 
 # Original regex for second-order perturbation entries
 pattern = re.compile(
     r"""
-    ^\s*\d+\.\s+LP\s*\(\s*(?P<lp_num>\d+)\)\s*O\s*(?P<o_idx>\d+)
+    ^\s*(?P<orbital_idx>\d+)\.\s+LP\s*\(\s*(?P<lp_num>\d+)\)\s*O\s*(?P<o_idx>\d+)
     \s+\d+\.\s+BD\*\(\s*1\)\s*
     (?: # two alternative orderings:
     C\s*(?P<c_idx1>\d+)-\s*P\s*(?P<p_idx1>\d+)
@@ -23,7 +25,7 @@ pattern = re.compile(
     )
     \s+(?P<E2>[0-9]+\.?[0-9]*)\s+(?P<ENL_EL>[0-9]+\.?[0-9]*)\s+(?P<F>[0-9]+\.?[0-9]*)
     """,
-    re.VERBOSE
+    re.VERBOSE | re.MULTILINE
 )
 
 # Another regex to extract LP orbital indices for any oxygen
@@ -31,93 +33,94 @@ lp_orbital_pattern = re.compile(
     r"""
     ^\s*(?P<orbital_idx>\d+)\.\s+LP\s*\(\s*(?P<lp_num>\d+)\)\s*O\s*(?P<o_idx>\d+)
     """,
-    re.VERBOSE
+    re.VERBOSE | re.MULTILINE
 )
 
+# Line that closes the second-order block (a '---' rule or the 'Total' line)
+_BLOCK_END_RE = re.compile(r"^[ \t]*(?:---|Total)", re.MULTILINE)
+
+def parse_nbo_all(file_path):
+    """
+    Parse the second-order perturbation block of an NBO output file in a single pass,
+    collecting both the LP(O) -> BD*(C-P) entries and the LP orbital indices.
+    Returns a tuple (second-order DataFrame, LP orbital DataFrame), as returned by
+    parse_nbo_second_order and extract_lp_orbital_indices respectively.
+    """
+    records = []
+    # LP orbital indices of the highest-index oxygen seen so far
+    max_o_idx = -1
+    last_o_orbitals = []
+    stem = Path(file_path).stem
+    with open(file_path, 'r') as f:
+        data = f.read()
+
+    # Only the lines of the second-order block are split and scanned
+    start = data.find('SECOND ORDER PERTURBATION THEORY ANALYSIS')
+    if start < 0:
+        block_lines = []
+    else:
+        start = data.find('\n', start) + 1 or len(data)
+        end_match = _BLOCK_END_RE.search(data, start)
+        block_lines = data[start:end_match.start() if end_match else len(data)].splitlines()
+
+    for line in block_lines:
+        # both patterns need an LP donor after the "NN." orbital number; the
+        # cheap substring/prefix checks skip all other lines without a regex call
+        if 'LP' not in line or not line.lstrip()[:1].isdigit():
+            continue
+        # an LP -> BD*(C-P) entry is also an LP orbital line, so the
+        # plain LP pattern is only tried when the full pattern fails
+        m = pattern.match(line)
+        if m:
+            d = m.groupdict()
+            lp_num = int(d['lp_num'])
+            # prefer the first branch, otherwise fallback to the second
+            if d['c_idx1']:
+                c_idx = int(d['c_idx1']); p_idx = int(d['p_idx1'])
+            else:
+                c_idx = int(d['c_idx2']); p_idx = int(d['p_idx2'])
+            E2 = float(d['E2'])
+            records.append({
+                'Filename': stem,
+                'lp_num': lp_num,
+                'c_idx': c_idx,
+                'E2': E2
+            })
+        else:
+            # Match any LP orbital (not just LP->BD* interactions)
+            m = lp_orbital_pattern.match(line)
+        if m:
+            o_idx = int(m.group('o_idx'))
+            if o_idx > max_o_idx:
+                max_o_idx = o_idx
+                last_o_orbitals = [int(m.group('orbital_idx'))]
+            elif o_idx == max_o_idx:
+                last_o_orbitals.append(int(m.group('orbital_idx')))
+
+    if not last_o_orbitals:
+        return pd.DataFrame(records), pd.DataFrame()
+
+    # One row per file: ALL orbital indices of the last oxygen, comma-separated
+    lp_df = pd.DataFrame([{
+        'Filename': stem,
+        'o_idx': max_o_idx,
+        'orbital_indices': ','.join(map(str, sorted(set(last_o_orbitals))))
+    }])
+    return pd.DataFrame(records), lp_df
+
 def parse_nbo_second_order(file_path):
     """
     Parse an NBO output file for LP(O) -> BD*(C-P) second-order perturbation entries.
     Returns a DataFrame with columns: ['file','lp_num','o_idx','c_idx','p_idx','E2']
     """
-    records = []
-    with open(file_path, 'r') as f:
-        in_block = False
-        for line in f:
-            if 'SECOND ORDER PERTURBATION THEORY ANALYSIS' in line:
-                in_block = True
-                continue
-            if in_block:
-                if line.strip() == '' or line.startswith(' within unit'):
-                    continue
-                if line.strip().startswith('---') or line.strip().startswith('Total'):
-                    break
-                m = pattern.match(line)
-                if m:
-                    d = m.groupdict()
-                    lp_num = int(d['lp_num'])
-                    # prefer the first branch, otherwise fallback to the second
-                    if d['c_idx1']:
-                        c_idx = int(d['c_idx1']); p_idx = int(d['p_idx1'])
-                    else:
-                        c_idx = int(d['c_idx2']); p_idx = int(d['p_idx2'])
-                    E2 = float(d['E2'])
-                    records.append({
-                        'Filename': Path(file_path).stem,
-                        'lp_num': lp_num,
-                        'c_idx': c_idx,
-                        'E2': E2
-                    })
-    return pd.DataFrame(records)
+    return parse_nbo_all(file_path)[0]
 
 def extract_lp_orbital_indices(file_path):
     """
     Extract LP orbital indices for the oxygen with the highest index.
     Returns a DataFrame with one row per file, with orbital indices listed comma-separated.
     """
-    lp_records = []
-
-    with open(file_path, 'r') as f:
-        in_block = False
-        for line in f:
-            if 'SECOND ORDER PERTURBATION THEORY ANALYSIS' in line:
-                in_block = True
-                continue
-            if in_block:
-                if line.strip() == '' or line.startswith(' within unit'):
-                    continue
-                if line.strip().startswith('---') or line.strip().startswith('Total'):
-                    break
-
-                # Match any LP orbital (not just LP->BD* interactions)
-                m = lp_orbital_pattern.match(line)
-                if m:
-                    d = m.groupdict()
-                    lp_records.append({
-                        'Filename': Path(file_path).stem,
-                        'o_idx': int(d['o_idx']),
-                        'lp_num': int(d['lp_num']),
-                        'orbital_idx': int(d['orbital_idx'])
-                    })
-
-    if not lp_records:
-        return pd.DataFrame()
-
-    # Convert to DataFrame and find the highest oxygen index
-    df = pd.DataFrame(lp_records)
-    max_o_idx = df['o_idx'].max()
-
-    # Filter for only the highest oxygen index
-    last_o_lps = df[df['o_idx'] == max_o_idx].copy()
-
-    # Group by filename only and concatenate ALL orbital indices with commas
-    grouped = last_o_lps.groupby(['Filename', 'o_idx']).agg({
-        'orbital_idx': lambda x: ','.join(map(str, sorted(x.unique())))
-    }).reset_index()
-
-    # Rename the column to be more descriptive
-    grouped = grouped.rename(columns={'orbital_idx': 'orbital_indices'})
-
-    return grouped
+    return parse_nbo_all(file_path)[1]
 
 #example usage
 
@@ -125,40 +128,42 @@ if __name__ == '__main__':
     # 1. Get all .out files in the specified folder
     files = list(Path('data_HLG/CMO_PBE0_NBO').glob('*.out'))
 
-    # 2. Parse each file for second-order perturbations
-    dfs = [parse_nbo_second_order(f) for f in files]
+    # 2. Parse each file once for second-order perturbations and LP orbital indices
+    #    (files are independent, so they are parsed in parallel; a few files per task
+    #    keep the pickling overhead low)
+    chunksize = max(1, len(files) // (4 * (os.cpu_count() or 1)))
+    with ProcessPoolExecutor() as executor:
+        parsed = list(executor.map(parse_nbo_all, files, chunksize=chunksize))
+    dfs = [df for df, _ in parsed]
     all_df = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
 
-    # 3. Extract LP orbital indices for the last oxygen
-    lp_orbital_dfs = [extract_lp_orbital_indices(f) for f in files]
+    # 3. Collect LP orbital indices for the last oxygen
+    lp_orbital_dfs = [lp_df for _, lp_df in parsed]
     lp_orbital_df = pd.concat(lp_orbital_dfs, ignore_index=True) if lp_orbital_dfs else pd.DataFrame()
 
     # 4. Prepare summary per file (original functionality)
-    summary_records = []
     lps = [1, 2, 3]
 
     if not all_df.empty:
-        for fname, group in all_df.groupby('Filename'):
-            c_list = sorted(group['c_idx'].unique())
-            label_map = {c: f'C{i+1}' for i, c in enumerate(c_list)}
-            rec = {'Filename': fname}
-
-            for lp in lps:
-                lp_group = group[group['lp_num'] == lp]
-                if lp_group.empty:
-                    for c in c_list:
-                        rec[f'LP{lp}-{label_map[c]}'] = None
-                    rec[f'LP{lp}-sum'] = None
-                else:
-                    for c in c_list:
-                        val = lp_group.loc[lp_group['c_idx'] == c, 'E2']
-                        rec[f'LP{lp}-{label_map[c]}'] = val.iloc[0] if not val.empty else None
-                    rec[f'LP{lp}-sum'] = lp_group['E2'].sum()
-
-            rec['Total-sum'] = group['E2'].sum() if not group.empty else None
-            summary_records.append(rec)
-
-    summary_df = pd.DataFrame(summary_records)
+        # Carbons of each file are labelled C1, C2, ... in ascending c_idx order
+        c_rank = all_df.groupby('Filename')['c_idx'].rank(method='dense').astype(int)
+
+        # First E2 per (file, LP, carbon), E2 sum per (file, LP) and per file
+        first_e2 = all_df.assign(c_label=c_rank).pivot_table(
+            index='Filename', columns=['lp_num', 'c_label'], values='E2', aggfunc='first')
+        first_e2.columns = [f'LP{lp}-C{k}' for lp, k in first_e2.columns]
+        lp_sums = all_df.groupby(['Filename', 'lp_num'])['E2'].sum().unstack()
+        lp_sums.columns = [f'LP{lp}-sum' for lp in lp_sums.columns]
+
+        summary_df = pd.concat([first_e2, lp_sums], axis=1)
+        summary_df['Total-sum'] = all_df.groupby('Filename')['E2'].sum()
+
+        # Keep only LP1-LP3, missing combinations stay empty
+        labels = [f'C{k}' for k in range(1, c_rank.max() + 1)] + ['sum']
+        columns = [f'LP{lp}-{label}' for lp in lps for label in labels] + ['Total-sum']
+        summary_df = summary_df.reindex(columns=columns).reset_index()
+    else:
+        summary_df = pd.DataFrame()
 
     #5. Write original summary to CSV
     summary_df.to_csv('nbo_LP_CP_summary.csv', index=False, na_rep='')
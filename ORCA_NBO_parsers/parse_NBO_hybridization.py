@@ -15,8 +15,11 @@ Functions:
       specific bond types (P–O or Donor–O) from an output file.
 """
 
+import mmap
+import os
 import pandas as pd
 import re
+from concurrent.futures import ProcessPoolExecutor
 
 # Helper functions
 def safe_float(s):
@@ -25,51 +28,61 @@ def safe_float(s):
     except:
         return None
 
-# Relaxed regex for orbital headers
+# Relaxed regex for orbital headers, anchored at the start of an NLMO line
+# ("  12. (2.00000)  99.12% BD ( 1) P  1- O  2"), so each match opens an entry
+# (bytes pattern, run against the memory-mapped output file)
 bd_line_pattern = re.compile(
-    r"\(\s*(?P<occupancy>\d+\.\d+)\)\s+(?P<bd_percent>\d+\.\d+)% BD\s+\( 1\)\s*(?P<atom1>\w+)\s+(?P<idx1>\d+)-\s+(?P<atom2>\w+)\s+(?P<idx2>\d+)"
+    rb"^\s*\d+\.\s*\((?P<occupancy>2\.00000)\)\s+(?P<bd_percent>\d+\.\d+)% BD\s+\( 1\)\s*(?P<atom1>\w+)\s+(?P<idx1>\d+)-\s+(?P<atom2>\w+)\s+(?P<idx2>\d+)",
+    re.MULTILINE
+)
+
+# Atom contribution line of an NLMO entry
+# ("  65.42%  O  2 s( 40.20%)p 1.44( 57.93%)d 0.05(  1.88%)")
+_ATOM_RE = re.compile(
+    rb"(\d+\.\d+)%\s+(\w+)\s+(\d+)\s+s\(\s*(\d+\.\d+)%\)p\s*([\d\.]+)\(\s*(\d+\.\d+)%\)d\s*[\d\.]+\(\s*(\d+\.\d+)%\)"
 )
 
 # Function to extract P–O and Donor–O data per file
 def extract_single_nlmo_row(file_path, filename, donor_tag):
-    donor_element, donor_index = donor_tag.split()
+    # compared against the bytes captured from the mapped file
+    donor_element, donor_index = donor_tag.encode().split()
     result_row = {"Filename": filename}
 
-    with open(file_path, "r") as f:
-        content = f.read()
-
-    section_match = re.search(
-        r"Hybridization/Polarization Analysis of NLMOs in NAO Basis:\s+NLMO / Occupancy / Percent from Parent NBO / Atomic Hybrid Contributions(.*?)\n\n",
-        content, re.DOTALL
-    )
-    if not section_match:
-        return result_row
-
-    nlmo_block = section_match.group(1)
-
-    blocks = re.split(
-        r"\n\s*(\d+\.\s*\(2\.00000\).*?BD\s+\( 1\)\s*\w+\s+\d+-\s+\w+\s+\d+)",
-        nlmo_block
-    )
-    entries = []
-    for i in range(1, len(blocks), 2):
-        header = blocks[i]
-        body = blocks[i + 1] if i + 1 < len(blocks) else ''
-        entries.append(header + '\n' + body)
-
-    for entry in entries:
-        bd_header_match = bd_line_pattern.search(entry)
-        if not bd_header_match:
-            continue
+    if os.path.getsize(file_path) == 0:
+        return result_row  # nothing to map
+
+    # map the file instead of reading and decoding it; only the NLMO section is copied out
+    with open(file_path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        # The section runs from the line after its title up to the first blank line;
+        # located with plain finds instead of a lazy DOTALL regex over the whole file.
+        # The raw bytes keep CRLF line endings, so a blank line is either of both forms
+        start = content.find(b"Hybridization/Polarization Analysis of NLMOs in NAO Basis:")
+        if start < 0:
+            return result_row
+        start = content.find(b"\n", start) + 1
+        ends = [end for end in (content.find(b"\n\n", start), content.find(b"\r\n\r\n", start))
+                if end >= 0]
+        if start == 0 or not ends:
+            return result_row
+        end = min(ends)
+
+        nlmo_block = content[start:end]
+
+    # Each BD header opens an entry that runs up to the next header
+    headers = list(bd_line_pattern.finditer(nlmo_block))
+    for i, bd_header_match in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(nlmo_block)
 
         atom1, atom2 = bd_header_match.group("atom1"), bd_header_match.group("atom2")
         idx1, idx2 = bd_header_match.group("idx1"), bd_header_match.group("idx2")
 
-        atom_pairs = {(atom1, idx1), (atom2, idx2)}
-        bond_type = None
-        if {("P", idx1), ("O", idx2)} <= atom_pairs or {("P", idx2), ("O", idx1)} <= atom_pairs:
+        # Classify the bond with plain comparisons (no per-entry sets)
+        if (atom1 == b"P" and atom2 == b"O") or (atom1 == b"O" and atom2 == b"P"):
             bond_type = "P–O"
-        elif {(donor_element, donor_index), ("O", idx1)} <= atom_pairs or {(donor_element, donor_index), ("O", idx2)} <= atom_pairs:
+        elif (atom1 == b"O" or atom2 == b"O") and (
+                (atom1 == donor_element and idx1 == donor_index)
+                or (atom2 == donor_element and idx2 == donor_index)):
             bond_type = "Donor–O"
         else:
             continue
@@ -77,18 +90,14 @@ def extract_single_nlmo_row(file_path, filename, donor_tag):
         occupancy = safe_float(bd_header_match.group("occupancy"))
         bd_percent = safe_float(bd_header_match.group("bd_percent"))
 
-        atom_matches = re.findall(
-            r"(\d+\.\d+)%\s+(\w+)\s+(\d+)\s+s\(\s*(\d+\.\d+)%\)p\s*([\d\.]+)\(\s*(\d+\.\d+)%\)d\s*[\d\.]+\(\s*(\d+\.\d+)%\)",
-            entry
-        )
-
         donor_contrib = o_contrib = p_contrib = None
         donor_ps = donor_d_percent = None
         o_ps = o_d_percent = None
         p_ps = p_d_percent = None
 
-        for match in atom_matches:
-            percent, elem, idx, s_pct, p_idx, p_pct, d_pct = match
+        # atom lines of this entry only, scanned in place within the block
+        for match in _ATOM_RE.finditer(nlmo_block, bd_header_match.start(), end):
+            percent, elem, idx, s_pct, p_idx, p_pct, d_pct = match.groups()
             percent = safe_float(percent)
             p_idx = safe_float(p_idx)
             d_pct = safe_float(d_pct)
@@ -97,11 +106,11 @@ def extract_single_nlmo_row(file_path, filename, donor_tag):
                 donor_contrib = percent
                 donor_ps = p_idx
                 donor_d_percent = d_pct
-            elif elem == "O":
+            elif elem == b"O":
                 o_contrib = percent
                 o_ps = p_idx
                 o_d_percent = d_pct
-            elif elem == "P":
+            elif elem == b"P":
                 p_contrib = percent
                 p_ps = p_idx
                 p_d_percent = d_pct
@@ -139,17 +148,18 @@ if __name__ == "__main__":
     donor_map = dict(zip(donor_df["Filename"], donor_df["Acceptor_atom"]))
 
     # Run extraction on all .out files in directory
-    all_rows = []
     from pathlib import Path
 
     folder = Path("data_HLG/CMO_PBE0_NBO")
-    for path in folder.glob("*.out"):
-        filename = path.name
-        if filename not in donor_map:
-            continue
-        donor_tag = donor_map[filename]
-        row = extract_single_nlmo_row(path, filename, donor_tag)
-        all_rows.append(row)
+    paths = [path for path in folder.glob("*.out") if path.name in donor_map]
+    filenames = [path.name for path in paths]
+    donor_tags = [donor_map[filename] for filename in filenames]
+
+    # Files are independent, so they are parsed in parallel
+    chunksize = max(1, len(paths) // (4 * (os.cpu_count() or 1)))
+    with ProcessPoolExecutor() as executor:
+        all_rows = list(executor.map(extract_single_nlmo_row, paths, filenames, donor_tags,
+                                     chunksize=chunksize))
 
     # Save to CSV
     df = pd.DataFrame(all_rows)
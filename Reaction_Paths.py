@@ -2,28 +2,30 @@
 A script to plot reaction energy profiles with distinct colors and approximate/missing values.
 """
 
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.lines import Line2D
 import os
 
 
+# Missing-value markers: ??? is missing, ~??? is approximate missing data
+_SENTINELS = {'???': (None, False), '~???': (None, True)}
+
 def parse_energy_value(value):
     """
     Parse energy value from string or numeric input.
     Returns a tuple (energy: float or None, is_approx: bool)
     """
+    # Plain numbers (the common case) need no string handling
+    if type(value) in (int, float):
+        return (float(value), False)
     if isinstance(value, str):
-        if value.strip() == '???':
-            return (None, False)
-        elif value.strip().startswith('~'):
+        stripped = value.strip()
+        sentinel = _SENTINELS.get(stripped)
+        if sentinel is not None:
+            return sentinel
+        elif stripped.startswith('~'):
             # Approximate value
-            approx_val = value.strip()[1:]
-            if approx_val == '???':
-                # Approximate missing data (~???), treat as missing
-                return (None, True)
             try:
-                val = float(approx_val)
+                val = float(stripped[1:])
                 return (val, True)
             except:
                 raise ValueError(f"Cannot parse approximate value: {value}")
@@ -35,7 +37,7 @@ def parse_energy_value(value):
             except:
                 raise ValueError(f"Cannot parse energy value: {value}")
     else:
-        # Numeric value
+        # Other numeric value (numpy scalars, ...)
         return (float(value), False)
 
 def plot_reaction_energy_profile(energy_lists, compound_labels,
@@ -48,32 +50,18 @@ def plot_reaction_energy_profile(energy_lists, compound_labels,
                                           markers=None,
                                           save_path=None,
                                           dpi=300,
-                                          show_plot=True):
+                                          show_plot=True,
+                                          max_boxed_labels=30):
     """
     Plot reaction energy profiles with distinct colors and approximate/missing values.
-    """
 
-    def parse_energy_value(value):
-        if isinstance(value, str):
-            if value.strip() == '???':
-                return (None, False)
-            elif value.strip().startswith('~'):
-                approx_val = value.strip()[1:]
-                if approx_val == '???':
-                    return (None, True)
-                try:
-                    val = float(approx_val)
-                    return (val, True)
-                except:
-                    raise ValueError(f"Cannot parse approximate value: {value}")
-            else:
-                try:
-                    val = float(value)
-                    return (val, False)
-                except:
-                    raise ValueError(f"Cannot parse energy value: {value}")
-        else:
-            return (float(value), False)
+    Value labels are drawn in a rounded box; for paths with more than
+    max_boxed_labels points the boxes are left out (None keeps them always).
+    """
+    # matplotlib is imported here, so importing parse_energy_value from this
+    # module does not pay for loading it
+    import matplotlib.pyplot as plt
+    from matplotlib.lines import Line2D
 
     if colors is None:
         colors = [
@@ -100,34 +88,36 @@ def plot_reaction_energy_profile(energy_lists, compound_labels,
     if markers is None:
         markers = ['o', 's', '^', 'D', 'v', '<', '>', 'p', '*', 'h'] * 10
 
+    # Label styles (text color, font weight, box), built once for all points
+    draw_boxes = max_boxed_labels is None or len(compound_labels) <= max_boxed_labels
+    label_styles = {}
+    for kind, label_color, font_weight in (('missing', 'red', 'bold'),
+                                           ('approx', '#FF6600', 'bold'),  # Distinct orange for approx
+                                           ('normal', 'black', 'normal')):
+        bbox = dict(boxstyle="round,pad=0.3", facecolor='white',
+                    edgecolor=label_color, alpha=0.95) if draw_boxes else None
+        label_styles[kind] = dict(color=label_color, fontweight=font_weight, bbox=bbox)
+
     for i, energies_raw in enumerate(energy_lists):
-        energies = []
-        approx_flags = []
-        missing_flags = []
-
-        for val in energies_raw:
-            energy, approx = parse_energy_value(val)
-            energies.append(energy)
-            approx_flags.append(approx)
-            missing_flags.append(energy is None)
-
-        energies_corrected = energies.copy()
-        for idx, e in enumerate(energies):
-            if e is None:
-                neighbors = []
-                for left_idx in range(idx-1, -1, -1):
-                    if energies[left_idx] is not None:
-                        neighbors.append(energies[left_idx])
-                        break
-                for right_idx in range(idx+1, len(energies)):
-                    if energies[right_idx] is not None:
-                        neighbors.append(energies[right_idx])
-                        break
-                if neighbors:
-                    fill_value = max(neighbors) + 20
-                else:
-                    fill_value = 20
-                energies_corrected[idx] = fill_value
+        # Parse the whole series at once into parallel lists
+        parsed = [parse_energy_value(val) for val in energies_raw]
+        energies, approx_flags = map(list, zip(*parsed)) if parsed else ([], [])
+        missing_flags = [energy is None for energy in energies]
+
+        # Place each missing value 20 above the larger of its nearest known
+        # neighbours (20 when the series has no known value at all): the
+        # neighbour indices are propagated with running max/min instead of
+        # scanning left and right for every gap
+        energies_corrected = np.array([np.nan if e is None else e for e in energies], dtype=float)
+        missing = np.isnan(energies_corrected)
+        idx = np.arange(len(energies_corrected))
+        left_idx = np.maximum.accumulate(np.where(missing, -1, idx))
+        right_idx = np.minimum.accumulate(np.where(missing, len(idx), idx)[::-1])[::-1]
+        left = np.where(left_idx >= 0, energies_corrected[left_idx.clip(0)], np.nan)
+        right = np.where(right_idx < len(idx),
+                         energies_corrected[right_idx.clip(max=len(idx) - 1)], np.nan)
+        fill = np.fmax(left, right) + 20
+        energies_corrected[missing] = np.where(np.isnan(fill), 20, fill)[missing]
 
         # Use distinct color for each series
         series_color = colors[i % len(colors)]
@@ -136,47 +126,34 @@ def plot_reaction_energy_profile(energy_lists, compound_labels,
         ax.plot(x_coords, energies_corrected, color=series_color,
                 linestyle='-', linewidth=3, alpha=0.9, label=series_labels[i])
 
-        for j, energy_val in enumerate(energies_corrected):
-            if missing_flags[j]:
-                ax.plot(x_coords[j], energy_val, marker='X', markersize=12,
-                        color='red', markerfacecolor='red',
-                        markeredgecolor='darkred', markeredgewidth=2)
-            elif approx_flags[j]:
-                ax.plot(x_coords[j], energy_val, marker=markers[i % len(markers)],
-                        markersize=11, color=series_color, markerfacecolor='white',
-                        markeredgewidth=3, markeredgecolor=series_color)
-            else:
-                ax.plot(x_coords[j], energy_val, marker=markers[i % len(markers)],
-                        markersize=9, color=series_color, markerfacecolor=series_color,
-                        markeredgecolor='white', markeredgewidth=1)
-
-        for j, val in enumerate(energies_raw):
-            if str(val).strip() in ['???', '~???']:
-                label_val = '???'
-                label_color = 'red'
-                font_weight = 'bold'
-            elif str(val).startswith('~'):
-                if str(val) == '~???':
-                    label_val = '???'
-                    label_color = 'red'
-                    font_weight = 'bold'
-                else:
-                    label_val = f'~{energies_corrected[j]:.1f}'
-                    label_color = '#FF6600'  # Distinct orange for approx
-                    font_weight = 'bold'
-            else:
-                label_val = f'{energies_corrected[j]:.1f}'
-                label_color = 'black'
-                font_weight = 'normal'
-
+        # One scatter per point category instead of one Line2D per point
+        # (s is the marker area, i.e. markersize**2; zorder 2 keeps the
+        # markers on top of the series line like Line2D markers)
+        missing_mask = np.array(missing_flags, dtype=bool)
+        approx_mask = np.array(approx_flags, dtype=bool) & ~missing_mask
+        normal_mask = ~(missing_mask | approx_mask)
+        marker = markers[i % len(markers)]
+
+        ax.scatter(x_coords[normal_mask], energies_corrected[normal_mask], marker=marker,
+                   s=81, facecolors=series_color, edgecolors='white', linewidths=1, zorder=2)
+        ax.scatter(x_coords[approx_mask], energies_corrected[approx_mask], marker=marker,
+                   s=121, facecolors='white', edgecolors=series_color, linewidths=3, zorder=2)
+        ax.scatter(x_coords[missing_mask], energies_corrected[missing_mask], marker='X',
+                   s=144, facecolors='red', edgecolors='darkred', linewidths=2, zorder=2)
+
+        label_kinds = ['missing' if str(val).strip() in ('???', '~???')
+                       else 'approx' if str(val).startswith('~')
+                       else 'normal' for val in energies_raw]
+        label_vals = ['???' if kind == 'missing'
+                      else f'~{energy:.1f}' if kind == 'approx'
+                      else f'{energy:.1f}'
+                      for kind, energy in zip(label_kinds, energies_corrected)]
+
+        for j, (label_val, kind) in enumerate(zip(label_vals, label_kinds)):
             ax.annotate(label_val, (x_coords[j], energies_corrected[j]),
                         textcoords='offset points',
                         xytext=(0, 15), ha='center', fontsize=10,
-                        color=label_color, fontweight=font_weight,
-                        bbox=dict(boxstyle="round,pad=0.3",
-                                facecolor='white',
-                                edgecolor=label_color,
-                                alpha=0.95))
+                        **label_styles[kind])
 
     ax.set_xticks(x_coords)
     ax.set_xticklabels(compound_labels, rotation=45, ha='right', fontsize=11)
@@ -214,14 +191,25 @@ def plot_reaction_energy_profile(energy_lists, compound_labels,
         directory = os.path.dirname(save_path) if os.path.dirname(save_path) else '.'
         os.makedirs(directory, exist_ok=True)
 
+        # Compute the tight bounding box (in inches, with the usual padding)
+        # once and pass it to both savefig calls, instead of letting each
+        # format lay out the whole figure again to find it. get_tightbbox()
+        # finds a renderer for any backend; a non-numeric pad ('layout') is
+        # left to savefig's own 'tight' handling
+        pad_inches = plt.rcParams['savefig.pad_inches']
+        if isinstance(pad_inches, (int, float)):
+            tight_bbox = fig.get_tightbbox().padded(pad_inches)
+        else:
+            tight_bbox = 'tight'
+
         png_file = f"{save_path}.png"
-        plt.savefig(png_file, dpi=dpi, bbox_inches='tight',
-                   facecolor='white', edgecolor='none', format='png')
+        fig.savefig(png_file, dpi=dpi, bbox_inches=tight_bbox,
+                    facecolor='white', edgecolor='none', format='png')
         saved_files.append(png_file)
 
         svg_file = f"{save_path}.svg"
-        plt.savefig(svg_file, bbox_inches='tight',
-                   facecolor='white', edgecolor='none', format='svg')
+        fig.savefig(svg_file, bbox_inches=tight_bbox,
+                    facecolor='white', edgecolor='none', format='svg')
         saved_files.append(svg_file)
 
         print(f"Plot saved successfully!")
@@ -8,11 +8,65 @@ and directional components for three rows (DIA, PARA, SUM) from the NMR shieldin
 tensor table. The results are saved to a CSV file for further analysis.
 """
 
-import re, glob, os
+import csv, re, glob, os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# Regex pattern for a floating‐point number (supports scientific notation)
+_FLOAT_RE = r"([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)"
+
+# Principal shielding values ("SIGMA_11  123.4") and the shielding table rows
+# (isotropic value plus x, y, z components) in one alternation, applied to each
+# line of a file; the named group tells which one matched
+_ROW_RE = r"\s+" + _FLOAT_RE + r"\s+" + _FLOAT_RE + r"\s+" + _FLOAT_RE + r"\s+" + _FLOAT_RE
+_SHIELDING_RE = re.compile(
+    r"(?P<SIGMA_11>SIGMA_11\s+" + _FLOAT_RE + r")"
+    r"|(?P<SIGMA_22>SIGMA_22\s+" + _FLOAT_RE + r")"
+    r"|(?P<SIGMA_33>SIGMA_33\s+" + _FLOAT_RE + r")"
+    r"|(?P<DIA>^\s*DIA" + _ROW_RE + r")"
+    r"|(?P<PARA>^\s*PARA" + _ROW_RE + r")"
+    r"|(?P<SUM>^\s*SUM" + _ROW_RE + r")"
+)
+_SIGMA_NAMES = ("SIGMA_11", "SIGMA_22", "SIGMA_33")
+
+def _parse_one(filepath):
+    """
+    Extracts the shielding values of a single .cs file (see extract_shielding_info).
 
-
-def extract_shielding_info(folder=".", output="shielding.csv"):
+    Returns:
+      tuple: (filename, SIGMA_11, SIGMA_22, SIGMA_33, DIA_iso, ..., SUM_z)
+    """
+    values = {}
+    # Stream the file line by line; the regex only runs on lines that
+    # can hold a value (cheap substring test first)
+    with open(filepath, "r") as file:
+        for line in file:
+            if not ("SIGMA" in line or "DIA" in line or "PARA" in line or "SUM" in line):
+                continue
+            for match in _SHIELDING_RE.finditer(line):
+                name = match.lastgroup
+                first = _SHIELDING_RE.groupindex[name] + 1
+                if name in _SIGMA_NAMES:
+                    # Sigma values: take last occurrence if multiple are found
+                    values[name] = match.group(first)
+                elif name not in values:
+                    # DIA/PARA/SUM rows: first occurrence, isotropic value, x, y, z
+                    values[name] = match.group(first, first + 1, first + 2, first + 3)
+
+    sigma11_val, sigma22_val, sigma33_val = (values.get(name) for name in _SIGMA_NAMES)
+    dia_iso, dia_x, dia_y, dia_z = values.get("DIA", (None,) * 4)
+    para_iso, para_x, para_y, para_z = values.get("PARA", (None,) * 4)
+    sum_iso, sum_x, sum_y, sum_z = values.get("SUM", (None,) * 4)
+
+    return (
+        os.path.basename(filepath),
+        sigma11_val, sigma22_val, sigma33_val,
+        dia_iso, dia_x, dia_y, dia_z,
+        para_iso, para_x, para_y, para_z,
+        sum_iso, sum_x, sum_y, sum_z
+    )
+
+def extract_shielding_info(folder=".", output="shielding.csv", max_workers=None, collect=True):
     """
     Extracts chemical shielding data from .cs files in the specified folder.
 
@@ -31,90 +85,30 @@ def extract_shielding_info(folder=".", output="shielding.csv"):
     Parameters:
       folder (str): Folder containing the .cs files (default: current directory).
       output (str): Name of the output CSV file (default: "shielding.csv").
+      max_workers (int): Number of worker processes (default: one per CPU core).
+      collect (bool): Also keep the rows in memory and return them. With False, rows are
+                      only streamed to the CSV file and None is returned.
 
     Returns:
       results (list of tuples): Each tuple contains the extracted data for one file.
     """
-    # Define a regex pattern for a floating‐point number (supports scientific notation)
-    float_re = r"([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)"
-
-    # Patterns for the principal shielding values
-    sigma11_pat = re.compile(r"SIGMA_11\s+" + float_re)
-    sigma22_pat = re.compile(r"SIGMA_22\s+" + float_re)
-    sigma33_pat = re.compile(r"SIGMA_33\s+" + float_re)
-
-    # Patterns for the shielding table rows.
-    # Each row has an isotropic value plus x, y, z components.
-    dia_pat = re.compile(r"^\s*DIA\s+" + float_re + r"\s+" + float_re + r"\s+" + float_re + r"\s+" + float_re, re.MULTILINE)
-    para_pat = re.compile(r"^\s*PARA\s+" + float_re + r"\s+" + float_re + r"\s+" + float_re + r"\s+" + float_re, re.MULTILINE)
-    sum_pat = re.compile(r"^\s*SUM\s+" + float_re + r"\s+" + float_re + r"\s+" + float_re + r"\s+" + float_re, re.MULTILINE)
-
-    results = []
-    # Loop over all .cs files in the specified folder
-    for filepath in glob.glob(os.path.join(folder, "*cs")):
-        electronic_data = {}
-        with open(filepath, "r") as file:
-            content = file.read()
-
-        # Extract sigma values (take last occurrence if multiple are found)
-        e_matches = sigma11_pat.findall(content)
-        sigma11_val = e_matches[-1] if e_matches else None
-
-        e_matches = sigma22_pat.findall(content)
-        sigma22_val = e_matches[-1] if e_matches else None
-
-        e_matches = sigma33_pat.findall(content)
-        sigma33_val = e_matches[-1] if e_matches else None
-
-        # Extract DIA row: isotropic value, x, y, z
-        dia_match = dia_pat.search(content)
-        if dia_match:
-            dia_iso = dia_match.group(1)
-            dia_x   = dia_match.group(2)
-            dia_y   = dia_match.group(3)
-            dia_z   = dia_match.group(4)
-        else:
-            dia_iso = dia_x = dia_y = dia_z = None
-
-        # Extract PARA row: isotropic value, x, y, z
-        para_match = para_pat.search(content)
-        if para_match:
-            para_iso = para_match.group(1)
-            para_x   = para_match.group(2)
-            para_y   = para_match.group(3)
-            para_z   = para_match.group(4)
-        else:
-            para_iso = para_x = para_y = para_z = None
-
-        # Extract SUM row: isotropic value, x, y, z
-        sum_match = sum_pat.search(content)
-        if sum_match:
-            sum_iso = sum_match.group(1)
-            sum_x   = sum_match.group(2)
-            sum_y   = sum_match.group(3)
-            sum_z   = sum_match.group(4)
-        else:
-            sum_iso = sum_x = sum_y = sum_z = None
-
-        results.append((
-            os.path.basename(filepath),
-            sigma11_val, sigma22_val, sigma33_val,
-            dia_iso, dia_x, dia_y, dia_z,
-            para_iso, para_x, para_y, para_z,
-            sum_iso, sum_x, sum_y, sum_z
-        ))
-
-    # Write the results to the specified CSV file
-    header = ("Filename,SIGMA_11,SIGMA_22,SIGMA_33,"
-              "DIA_iso,DIA_x,DIA_y,DIA_z,"
-              "PARA_iso,PARA_x,PARA_y,PARA_z,"
-              "SUM_iso,SUM_x,SUM_y,SUM_z\n")
-
-    with open(output, "w") as out_file:
-        out_file.write(header)
-        for row in results:
-            row_str = ",".join([str(item) if item is not None else "" for item in row])
-            out_file.write(row_str + "\n")
+    results = [] if collect else None
+
+    header = ["Filename", "SIGMA_11", "SIGMA_22", "SIGMA_33",
+              "DIA_iso", "DIA_x", "DIA_y", "DIA_z",
+              "PARA_iso", "PARA_x", "PARA_y", "PARA_z",
+              "SUM_iso", "SUM_x", "SUM_y", "SUM_z"]
+
+    # Parse all .cs files in the specified folder in parallel and write each row
+    # to the specified CSV file as soon as it is available (None values become empty fields)
+    with open(output, "w", newline="") as out_file, \
+            ProcessPoolExecutor(max_workers=max_workers) as executor:
+        writer = csv.writer(out_file, lineterminator="\n")
+        writer.writerow(header)
+        for row in executor.map(_parse_one, glob.glob(os.path.join(folder, "*.cs")), chunksize=8):
+            writer.writerow(row)
+            if collect:
+                results.append(row)
 
     print(f"Shielding data extracted and saved to '{output}'.")
     return results
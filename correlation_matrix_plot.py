@@ -9,6 +9,7 @@ and their mutual dependencies. The module uses correlation matrices, R² matrice
 and visual heatmaps to illustrate these relationships.
 
 Dependencies:
+- numpy
 - pandas
 - seaborn
 - matplotlib.pyplot
@@ -17,16 +18,8 @@ The output includes correlation matrices, R² matrices, and saved heatmaps
 for each transformation applied.
 """
 
-import seaborn as sns
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-
-data_dropped = pd.read_csv('data.csv')
-
-
-
-# Select only numeric columns
-#numeric_df = data_dropped.select_dtypes(include=['number'])
 
 # Define transformation functions.
 # Note: For logarithmic, we use log(|x|+1) to avoid issues with negatives or zero.
@@ -38,53 +31,87 @@ transformations = {
     #'inverse_cube': lambda x: np.where(x == 0, np.nan, 1/(x**3)),
     #'logarithmic': lambda x: np.log(np.abs(x) + 1)
 }
-# Loop over each transformation.
-for name, func in transformations.items():
-    # Apply the transformation to every numeric column
-    transformed_df = data_dropped.apply(func)
-
-    # Create an output folder for scatter plots for this transformation.
-    folder_name = f"scatter_plots/scatter_plots_{name}"
-    #os.makedirs(folder_name, exist_ok=True)
-
-    # Create an empty DataFrame to store the one-sided correlations.
-    # Here, for each pair (i, j), we correlate the original column i with the transformed version of column j.
-    corr_matrix = pd.DataFrame(index=data_dropped.columns, columns=data_dropped.columns, dtype=float)
-
-    # Loop over every pair of original and transformed columns.
-    for orig_col in data_dropped.columns:
-        for trans_col in data_dropped.columns:
-            # Compute Pearson correlation between original column and transformed column.
-            corr_val = transformed_df[orig_col].corr(transformed_df[trans_col])
-            corr_matrix.loc[orig_col, trans_col] = corr_val
-
-            # # Generate scatter plot for this pair.
-            # plt.figure(figsize=(8, 6))
-            # plt.scatter(numeric_df[orig_col], transformed_df[trans_col], alpha=0.6)
-            # plt.xlabel(orig_col)
-            # plt.ylabel(f"{trans_col} ({name} transformed)")
-            # plt.title(f"{orig_col} vs. {trans_col}\nPearson r = {corr_val:.2f}")
-            #
-            # # Save the scatter plot in the corresponding folder.
-            # plot_filename = os.path.join(folder_name, f"{orig_col}_vs_{trans_col}.png")
-            # plt.savefig(plot_filename)
-            # plt.close()
-
-    # Compute the R² matrix as the square of the correlation coefficients.
-    r2_matrix = corr_matrix ** 2
-
-    # Print the matrices to the console.
-    print(f"\nCorrelation matrix {name}")
-    print(corr_matrix)
-    print(f"\nR² matrix {name}")
-    print(r2_matrix)
-
-    # Create and save the R² heatmap for this transformation.
-    plt.figure(figsize=(18, 18))
-    sns.heatmap(r2_matrix, annot=True, cmap='coolwarm', fmt=".2f")
-    plt.title(f'Pairwise R² Matrix Heatmap - {name.capitalize()} Transformation\n(Original vs. Transformed)')
-
-    heatmap_filename = f"R2_heatmap_{name}.png"
-    plt.savefig(heatmap_filename)
-    plt.show()  # Display the heatmap plot
-    plt.close()
\ No newline at end of file
+
+def main(data_file='data.csv', max_annotated_columns=20):
+    """
+    Computes and prints the correlation and R² matrices of *data_file* for every
+    transformation and saves one R² heatmap per transformation.
+    Heatmaps of more than *max_annotated_columns* columns are drawn without
+    the per-cell values.
+    """
+    # seaborn and matplotlib are only needed for the heatmaps, so they are
+    # imported here instead of when the module is imported
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
+    data_dropped = pd.read_csv(data_file)
+
+    # Select only numeric columns; their values are taken out as one 2D array once
+    # and every transformation below works on that array
+    numeric_df = data_dropped.select_dtypes(include=['number'])
+    numeric_arr = numeric_df.to_numpy()
+
+    # Loop over each transformation.
+    for name, func in transformations.items():
+        # Apply the transformation to every numeric column at once on the cached
+        # array (the identity transformation needs no copy at all)
+        if func is transformations['']:
+            transformed_df = numeric_df
+        else:
+            transformed_df = pd.DataFrame(func(numeric_arr),
+                                          index=numeric_df.index, columns=numeric_df.columns)
+
+        # Create an output folder for scatter plots for this transformation.
+        folder_name = f"scatter_plots/scatter_plots_{name}"
+        #os.makedirs(folder_name, exist_ok=True)
+
+        # Pearson correlation between every pair of (transformed) columns in one
+        # vectorized call instead of one Series.corr per pair: np.corrcoef on the
+        # float array, or pandas (pairwise-complete observations) if there are NaNs.
+        # Here, for each pair (i, j), we correlate column i with the transformed version of column j.
+        transformed_arr = transformed_df.to_numpy(dtype=np.float64)
+        if np.isnan(transformed_arr).any():
+            corr_matrix = transformed_df.corr(method='pearson')
+        else:
+            corr_matrix = pd.DataFrame(np.corrcoef(transformed_arr, rowvar=False),
+                                       index=transformed_df.columns, columns=transformed_df.columns)
+
+        # # Generate a scatter plot for every pair (r taken from corr_matrix).
+        # for orig_col in numeric_df.columns:
+        #     for trans_col in numeric_df.columns:
+        #         corr_val = corr_matrix.loc[orig_col, trans_col]
+        #         plt.figure(figsize=(8, 6))
+        #         plt.scatter(numeric_df[orig_col], transformed_df[trans_col], alpha=0.6)
+        #         plt.xlabel(orig_col)
+        #         plt.ylabel(f"{trans_col} ({name} transformed)")
+        #         plt.title(f"{orig_col} vs. {trans_col}\nPearson r = {corr_val:.2f}")
+        #
+        #         # Save the scatter plot in the corresponding folder.
+        #         plot_filename = os.path.join(folder_name, f"{orig_col}_vs_{trans_col}.png")
+        #         plt.savefig(plot_filename)
+        #         plt.close()
+
+        # Compute the R² matrix as the square of the correlation coefficients.
+        r2_matrix = corr_matrix ** 2
+
+        # Print the matrices to the console.
+        print(f"\nCorrelation matrix {name}")
+        print(corr_matrix)
+        print(f"\nR² matrix {name}")
+        print(r2_matrix)
+
+        # Create and save the R² heatmap for this transformation.
+        plt.figure(figsize=(18, 18))
+        # Cell values are only written for up to max_annotated_columns columns;
+        # beyond that the K² text labels dominate the rendering time
+        sns.heatmap(r2_matrix, annot=len(r2_matrix.columns) <= max_annotated_columns,
+                    cmap='coolwarm', fmt=".2f")
+        plt.title(f'Pairwise R² Matrix Heatmap - {name.capitalize()} Transformation\n(Original vs. Transformed)')
+
+        heatmap_filename = f"R2_heatmap_{name}.png"
+        plt.savefig(heatmap_filename)
+        plt.show()  # Display the heatmap plot
+        plt.close()
+
+if __name__ == "__main__":
+    main()